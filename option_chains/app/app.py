@@ -1,10 +1,25 @@
+import json
+import os
+import threading
+import time
+import typing
 from collections import defaultdict
 
 import pyetrade
-from flask import Flask
-from flask import render_template, redirect, url_for, request
-
-from option_chains import options_manager, constants
+from flask import Flask, Response, g
+from flask import jsonify, render_template, redirect, url_for, request
+from flask import stream_with_context
+
+from option_chains import (
+    constants,
+    metrics,
+    options_manager,
+    prefetch,
+    pricing,
+    scan_results,
+    sectors,
+)
+from option_chains.cache import SQLiteCache, TTLCache
 
 global oauth_object
 global oauth_token
@@ -13,6 +28,156 @@ global oauth_secret
 
 app = Flask(__name__)
 
+# managers (and their http sessions) are reused across requests for the same token
+managers = {}
+managers_lock = threading.Lock()
+
+
+# directory to keep every scanned put in for back-testing. Nothing is kept when unset.
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR")
+snapshot_store = None
+if SNAPSHOT_DIR:
+    from option_chains.snapshot_store import SnapshotStore
+
+    snapshot_store = SnapshotStore(SNAPSHOT_DIR)
+
+
+# SQLite file shared by every gunicorn worker on the host for quotes, expiry
+# dates, chains, failed tickers and the login, which also keeps them warm across
+# restarts. Values are unpickled, so it must only be writable by the app. Each
+# worker keeps its own caches in memory when unset.
+CACHE_PATH = os.environ.get("CACHE_PATH")
+LOGIN_TTL = 24 * 3600  # seconds, E*Trade tokens expire at midnight anyway
+# fetch every ticker's expiry calendar in the background after logging in. Off
+# by default, as the warm-up competes with the first scans for the rate limit
+WARM_EXPIRY_DATES = os.environ.get("WARM_EXPIRY_DATES", "False") == "True"
+# held while warming, so logging in again doesn't start another warm-up
+warm_expiry_lock = threading.Lock()
+
+shared_caches = {}
+login_cache = None
+if CACHE_PATH:
+    shared_caches.update(
+        {
+            name: SQLiteCache(CACHE_PATH, name, ttl=cache.ttl, maxsize=cache.maxsize)
+            for name, cache in [
+                ("quote_cache", options_manager.QUOTE_CACHE),
+                ("chain_cache", options_manager.CHAIN_CACHE),
+                ("expiry_cache", options_manager.EXPIRY_CACHE),
+                ("failed_tickers", options_manager.FAILED_TICKERS),
+            ]
+        }
+    )
+    login_cache = SQLiteCache(CACHE_PATH, "login", ttl=LOGIN_TTL, maxsize=1)
+
+
+def load_login():
+    """Pick up a login completed on another worker."""
+    global oauth_token
+    global oauth_secret
+    tokens = login_cache.get("tokens") if login_cache is not None else None
+    if tokens is None or tokens == (
+        globals().get("oauth_token"),
+        globals().get("oauth_secret"),
+    ):
+        return
+    oauth_token, oauth_secret = tokens
+    with managers_lock:
+        managers.clear()
+
+
+def get_manager() -> options_manager.OptionsManager:
+    key = (oauth_token, oauth_secret)
+    with managers_lock:
+        if key not in managers:
+            managers[key] = options_manager.OptionsManager(
+                consumer_key=constants.CONSUMER_KEY,
+                consumer_secret=constants.CONSUMER_SECRET,
+                oauth_token=oauth_token,
+                oauth_secret=oauth_secret,
+                snapshot_store=snapshot_store,
+                **shared_caches,
+            )
+        return managers[key]
+
+
+SCAN_RESULTS_TTL = 60  # seconds
+
+# finished scans keyed by their parameters, so paging through one doesn't rescan
+scan_results_cache = TTLCache(ttl=SCAN_RESULTS_TTL, maxsize=32)
+
+
+def get_scan_results_key(scan_args: dict, time_budget: typing.Optional[float]):
+    # a partial scan is only reused for requests with the same budget, so the
+    # pages of one table come from one result set
+    return (*sorted(scan_args.items()), ("time_budget", time_budget))
+
+
+def get_scan_results(
+    scan_args: dict, time_budget: typing.Optional[float] = None
+) -> scan_results.ScanResults:
+    key = get_scan_results_key(scan_args, time_budget)
+    results = scan_results_cache.get(key)
+
+    # prefer a prefetched snapshot newer than the cached result
+    snapshot = prefetcher.get_snapshot(scan_args) if prefetcher is not None else None
+    if snapshot is not None and (
+        results is None or results.created_at < snapshot.taken_at
+    ):
+        results = scan_results.ScanResults(snapshot.df, created_at=snapshot.taken_at)
+        scan_results_cache.set(key, results)
+
+    if results is None:
+        start = time.time()
+        results = scan_results.ScanResults(
+            get_manager().get_all_options_frame(**scan_args, time_budget=time_budget),
+            created_at=start,
+        )
+        scan_results_cache.set(key, results)
+    return results
+
+
+def get_what_if(form) -> typing.Optional[pricing.WhatIf]:
+    """The hypothetical market from the What-If form fields, or None if both are
+    blank. The price change is a percentage, like the other GUI percentages."""
+    price_change = form.get("whatif_price_change", "")
+    days_forward = form.get("whatif_days", "")
+    if not price_change and not days_forward:
+        return None
+    return pricing.WhatIf(
+        price_change=float(price_change or 0) / 100,
+        days_forward=int(days_forward or 0),
+    )
+
+
+@app.before_request
+def share_login():
+    load_login()
+
+
+@app.before_request
+def start_timings():
+    # add ?timings=1 to a page to get a per-stage timing footer
+    if request.values.get("timings"):
+        g.timings_context = metrics.collect_timings()
+        g.timings = g.timings_context.__enter__()
+
+
+@app.teardown_request
+def stop_timings(exc):
+    if "timings_context" in g:
+        g.timings_context.__exit__(None, None, None)
+
+
+@app.context_processor
+def inject_timings():
+    return {"timings": g.get("timings")}
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
 
 @app.route("/login")
 def login():
@@ -29,6 +194,15 @@ def login():
     )
 
 
+def warm_expiry_dates():
+    if not warm_expiry_lock.acquire(blocking=False):
+        return
+    try:
+        get_manager().warm_expiry_dates()
+    finally:
+        warm_expiry_lock.release()
+
+
 @app.route("/auth", methods=["POST"])
 def auth():
     # don't use .get because redirect should always be set in /login
@@ -41,6 +215,17 @@ def auth():
     global oauth_secret
     oauth_token = tokens["oauth_token"]
     oauth_secret = tokens["oauth_token_secret"]
+    if login_cache is not None:
+        login_cache.set("tokens", (oauth_token, oauth_secret))
+
+    # managers for previous tokens can no longer make requests
+    with managers_lock:
+        managers.clear()
+
+    if WARM_EXPIRY_DATES:
+        threading.Thread(
+            target=warm_expiry_dates, name="warm_expiry", daemon=True
+        ).start()
 
     return redirect(url_for(redirect_page))
 
@@ -61,21 +246,23 @@ def index():
         "min_open_interest": 1,
         "min_annualized_return": 0.0,
         "include_next_earnings_date": "True",
+        "whatif_price_change": "",
+        "whatif_days": "",
     }
 
-    manager = options_manager.OptionsManager(
-        consumer_key=constants.CONSUMER_KEY,
-        consumer_secret=constants.CONSUMER_SECRET,
-        oauth_token=oauth_token,
-        oauth_secret=oauth_secret,
-    )
+    manager = get_manager()
+    what_if = get_what_if(request.form)
 
     ticker = request.form.get("ticker", defaults["ticker"])
     min_strike = float(request.form.get("min_strike", defaults["min_strike"]))
     max_strike = float(request.form.get("max_strike", defaults["max_strike"]))
 
+    # get market data values for ticker to use in general stock info
+    market_data = manager.get_market_data(ticker)
+
     result = manager.get_options_info(
         ticker=ticker,
+        market_data=market_data,
         min_strike=min_strike,
         max_strike=max_strike,
         increment=float(request.form.get("increment", defaults["increment"])),
@@ -94,19 +281,22 @@ def index():
                 "include_next_earnings_date", defaults["include_next_earnings_date"]
             )
         ),
+        what_if=what_if,
     )
 
     options_dict = defaultdict(list)
     for option_info in result:
         options_dict[option_info["expiryDate"]].append(option_info)
 
+    # with a what-if, each expiry is ranked by its return in that market instead
+    if what_if is not None:
+        sort_key = lambda d: -d["whatIf"]["whatIfAnnualizedReturn"]
+    else:
+        sort_key = lambda d: d["strikePrice"]
     options_dict = {
-        key: sorted(value, key=lambda d: d["strikePrice"])
-        for key, value in options_dict.items()
+        key: sorted(value, key=sort_key) for key, value in options_dict.items()
     }
 
-    # get market data values for ticker to use in general stock info
-    market_data = manager.get_market_data(ticker)
     company_name = market_data.company_name[0:15]
     market_price = round(market_data.market_price, 2)
     high_52 = round(market_data.high_52, 2)
@@ -114,9 +304,9 @@ def index():
     beta = round(market_data.beta, 2)
     next_earnings_date = market_data.next_earnings_date
 
-    # TODO: remove duplicate code (original in options_manager.py)
-    max_strike_resolved = int(float(market_price) * (1 - (max_strike / 100)))
-    min_strike_resolved = int(float(market_price) * (1 - (min_strike / 100)))
+    min_strike_resolved, max_strike_resolved = manager.get_strike_range(
+        market_price, min_strike, max_strike
+    )
 
     return render_template(
         "index.html",
@@ -135,84 +325,291 @@ def index():
     )
 
 
-@app.route("/multi", methods=["GET", "POST"])
-def multi():
-    if "oauth_token" not in globals():
-        return redirect(url_for("login", redirect="multi"))
-
-    defaults = {
-        "sector": "Communication Services",
-        "sub_sector": "All",
-        "min_strike": 30,
-        "max_strike": 20,
-        "lookahead": 3,
-        "contracts": 1,
-        "min_volume": 1,
-        "min_open_interest": 1,
-        "min_annualized_return": 0.0,
-        "include_next_earnings_date": "True",
-        "percentile_of_52_range": 25,
-        "blue_chip_only": "False",
-    }
-
-    manager = options_manager.OptionsManager(
-        consumer_key=constants.CONSUMER_KEY,
-        consumer_secret=constants.CONSUMER_SECRET,
-        oauth_token=oauth_token,
-        oauth_secret=oauth_secret,
-    )
-
-    sector = request.form.get("sector", defaults["sector"])
-    sub_sector = request.form.get("sub_sector", defaults["sub_sector"])
-    df = manager.get_all_options_info(
+MULTI_DEFAULTS = {
+    "sector": "Communication Services",
+    "sub_sector": "All",
+    "min_strike": 30,
+    "max_strike": 20,
+    "lookahead": 3,
+    "contracts": 1,
+    "min_volume": 1,
+    "min_open_interest": 1,
+    "min_annualized_return": 0.0,
+    "include_next_earnings_date": "True",
+    "percentile_of_52_range": 25,
+    "blue_chip_only": "False",
+    "stream": "False",
+    "server_side": "False",
+    "time_budget": "",
+    "top_k": "",
+    "rank_by": "annualizedReturn",
+    "whatif_price_change": "",
+    "whatif_days": "",
+}
+
+
+def get_multi_scan_args(form) -> dict:
+    defaults = MULTI_DEFAULTS
+    sector = form.get("sector", defaults["sector"])
+    sub_sector = form.get("sub_sector", defaults["sub_sector"])
+    top_k = form.get("top_k", defaults["top_k"])
+    return dict(
         sector=None if sector == "All" else sector,
         sub_sector=None if sub_sector == "All" else sub_sector,
         percentile_of_52_range=int(
-            request.form.get(
-                "percentile_of_52_range", defaults["percentile_of_52_range"]
-            )
+            form.get("percentile_of_52_range", defaults["percentile_of_52_range"])
         ),
-        min_strike=float(request.form.get("min_strike", defaults["min_strike"])),
-        max_strike=float(request.form.get("max_strike", defaults["max_strike"])),
-        month_look_ahead=int(request.form.get("lookahead", defaults["lookahead"])),
-        min_volume=int(request.form.get("min_volume", defaults["min_volume"])),
+        min_strike=float(form.get("min_strike", defaults["min_strike"])),
+        max_strike=float(form.get("max_strike", defaults["max_strike"])),
+        month_look_ahead=int(form.get("lookahead", defaults["lookahead"])),
+        min_volume=int(form.get("min_volume", defaults["min_volume"])),
         min_open_interest=int(
-            request.form.get("min_open_interest", defaults["min_open_interest"])
+            form.get("min_open_interest", defaults["min_open_interest"])
         ),
         min_annualized_return=float(
-            request.form.get("min_annualized_return", defaults["min_annualized_return"])
+            form.get("min_annualized_return", defaults["min_annualized_return"])
         ),
         include_next_earnings_date="True"
         == (
-            request.form.get(
+            form.get(
                 "include_next_earnings_date", defaults["include_next_earnings_date"]
             )
         ),
         blue_chip_only="True"
-        == (request.form.get("blue_chip_only", defaults["blue_chip_only"])),
+        == (form.get("blue_chip_only", defaults["blue_chip_only"])),
+        top_k=int(top_k) if top_k else None,
+        rank_by=form.get("rank_by", defaults["rank_by"]),
     )
 
-    # get unique sectors/sub-sectors for use in dropdowns
-    csv_df = manager.get_csv_df()
-    all_sectors = sorted(list(set(csv_df["Sector"].to_list())))
-    all_sectors.insert(0, "All")
-    all_sub_sectors = sorted(list(set(csv_df["Sub-Sector"].to_list())))
-    all_sub_sectors.insert(0, "All")
 
-    # # get {sector1: [sub_sector1, sub_sector2], sector2: [...]]
-    # all_sub_sectors = {
-    #     sector: list(set(csv_df[csv_df["Sector"] == sector]["Sub-Sector"].to_list()))
-    #     for sector in all_sectors
-    # }
+def get_time_budget(form) -> typing.Optional[float]:
+    # kept out of the scan args so any budget can be served by a full snapshot
+    time_budget = form.get("time_budget", MULTI_DEFAULTS["time_budget"])
+    return float(time_budget) if time_budget else None
 
-    return render_template(
-        "multi.html",
-        df=df.to_html(classes="table table-striped table-condensed", table_id="df"),
-        titles=df.columns.values,
+
+# comma separated sectors to keep warm in the background, e.g. "All" or
+# "Technology,Energy". Prefetching is off when unset.
+PREFETCH_SECTORS = [
+    sector.strip()
+    for sector in os.environ.get("PREFETCH_SECTORS", "").split(",")
+    if sector.strip()
+]
+PREFETCH_INTERVAL = float(
+    os.environ.get("PREFETCH_INTERVAL", prefetch.DEFAULT_INTERVAL)
+)
+PREFETCH_REQUEST_BUDGET = int(
+    os.environ.get("PREFETCH_REQUEST_BUDGET", prefetch.DEFAULT_REQUEST_BUDGET)
+)
+
+
+def get_prefetch_manager():
+    load_login()
+    # nothing can be fetched until someone has logged in
+    if "oauth_token" not in globals():
+        return None
+    return get_manager()
+
+
+prefetcher = None
+if PREFETCH_SECTORS and not CACHE_PATH:
+    # every worker would run its own scans and spend its own budget
+    app.logger.warning("Prefetching needs CACHE_PATH shared by the workers, skipping.")
+elif PREFETCH_SECTORS:
+    # snapshots use the /multi defaults, so they answer unchanged submits. One
+    # worker holds the lock and runs the scans, the others read its snapshots
+    prefetcher = prefetch.PrefetchScheduler(
+        get_prefetch_manager,
+        scans=[get_multi_scan_args({"sector": sector}) for sector in PREFETCH_SECTORS],
+        interval=PREFETCH_INTERVAL,
+        request_budget=PREFETCH_REQUEST_BUDGET,
+        snapshots=SQLiteCache(
+            CACHE_PATH,
+            "prefetch",
+            ttl=2 * PREFETCH_INTERVAL,
+            maxsize=len(PREFETCH_SECTORS),
+        ),
+        lock_path=f"{CACHE_PATH}.prefetch.lock",
+    )
+    prefetcher.start()
+
+
+@app.route("/multi", methods=["GET", "POST"])
+def multi():
+    if "oauth_token" not in globals():
+        return redirect(url_for("login", redirect="multi"))
+
+    sector_index = sectors.get_sector_index()
+    template_args = dict(
         prior_form=dict(request.form),
-        defaults=defaults,
-        all_sectors=all_sectors,
-        all_sub_sectors=all_sub_sectors,
+        defaults=MULTI_DEFAULTS,
+        all_sectors=sector_index.all_sectors,
+        all_sub_sectors=sector_index.all_sub_sectors,
+    )
+
+    # in server side mode the table pages through /api/scan instead
+    if request.form.get("server_side", MULTI_DEFAULTS["server_side"]) == "True":
+        return render_template(
+            "multi.html",
+            df=None,
+            titles=["", *options_manager.DISPLAY_COLUMNS],
+            api_url=url_for("api_scan", **request.form),
+            **template_args,
+        )
+
+    # in stream mode the page loads empty and rows arrive from /multi/stream
+    if request.form.get("stream", MULTI_DEFAULTS["stream"]) == "True":
+        return render_template(
+            "multi.html",
+            df=None,
+            titles=["", *options_manager.DISPLAY_COLUMNS],
+            stream_url=url_for("multi_stream", **request.form),
+            **template_args,
+        )
+
+    manager = get_manager()
+    scan_args = get_multi_scan_args(request.form)
+    time_budget = get_time_budget(request.form)
+    what_if = get_what_if(request.form)
+
+    order = None
+    snapshot = prefetcher.get_snapshot(scan_args) if prefetcher is not None else None
+    if what_if is not None:
+        # re-rank the cached scan, so trying what-ifs makes no requests
+        snapshot = None
+        df = get_scan_results(scan_args, time_budget).df
+        if not df.empty:
+            df = manager.reprice_puts(df, what_if, labelled=True)
+            df = df.sort_values("WI A%", ascending=False)
+            # the table's first column is the hidden index
+            order = [[df.columns.get_loc("WI A%") + 1, "desc"]]
+    elif snapshot is not None:
+        df = snapshot.df
+    else:
+        start = time.time()
+        df = manager.get_all_options_info(
+            **scan_args, time_budget=time_budget, format_values=False
+        )
+        # keep the scan for what-ifs on it
+        scan_results_cache.set(
+            get_scan_results_key(scan_args, time_budget),
+            scan_results.ScanResults(df, created_at=start),
+        )
+    if order is None and scan_args["top_k"] and not df.empty:
+        # top-K scans arrive best first, so the table keeps that order
+        rank_label = options_manager.DISPLAY_LABELS[scan_args["rank_by"]]
+        order = [[df.columns.get_loc(rank_label) + 1, "desc"]]
+
+    # typed values are only turned into display strings as the table is rendered
+    with metrics.span("to_html"):
+        html = df.to_html(
+            classes="table table-striped table-condensed",
+            table_id="df",
+            formatters=options_manager.DISPLAY_FORMATTERS,
+        )
+
+    with metrics.span("render_template"):
+        return render_template(
+            "multi.html",
+            df=html,
+            titles=df.columns.values,
+            data_age=None if snapshot is None else int(snapshot.age),
+            unscanned=df.attrs.get("unscanned"),
+            order=order,
+            **template_args,
+        )
+
+
+@app.route("/multi/stream")
+def multi_stream():
+    if "oauth_token" not in globals():
+        return Response(status=401)
+
+    manager = get_manager()
+    scan_args = get_multi_scan_args(request.args)
+    time_budget = get_time_budget(request.args)
+
+    def generate():
+        start = time.monotonic()
+        rows = 0
+        tickers = set()
+        unscanned = []
+        for df in manager.iter_all_options_info(**scan_args, time_budget=time_budget):
+            unscanned = df.attrs.get("unscanned", unscanned)
+            if df.empty:
+                continue
+            rows += len(df)
+            tickers.update(df["Ticker"])
+            # include the index so rows line up with the hidden first column
+            yield f"event: rows\ndata: {df.reset_index().to_json(orient='values')}\n\n"
+
+        summary = {
+            "rows": rows,
+            "tickers": len(tickers),
+            "seconds": round(time.monotonic() - start, 1),
+            "unscanned": unscanned,
+        }
+        yield f"event: summary\ndata: {json.dumps(summary)}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/api/scan")
+def api_scan():
+    """Sorted, filtered page of a cached scan.
+
+    Takes the /multi form fields as scan parameters, plus ``sort`` (e.g.
+    ``A%,-Stk``), ``search``, ``filter[<column>]``, ``offset``, ``limit`` and
+    ``format`` (``display`` for the strings shown on /multi instead of raw values).
+    """
+    if "oauth_token" not in globals():
+        return jsonify(error="Not logged in"), 401
+
+    args = request.args
+    filters = {
+        key[len("filter[") : -1]: value
+        for key, value in args.items()
+        if key.startswith("filter[") and key.endswith("]")
+    }
+    try:
+        results = get_scan_results(get_multi_scan_args(args), get_time_budget(args))
+        total, page = results.query(
+            sort=scan_results.parse_sort(args.get("sort")),
+            filters=filters,
+            search=args.get("search"),
+            offset=int(args.get("offset", 0)),
+            limit=int(args.get("limit", scan_results.DEFAULT_PAGE_SIZE)),
+        )
+    except ValueError as ex:
+        return jsonify(error=str(ex)), 400
+
+    if args.get("format") == "display" and not page.empty:
+        page = get_manager().format_display_values(page)
+
+    return Response(
+        json.dumps(
+            {
+                "total": len(results),
+                "filtered": total,
+                "created_at": results.created_at,
+                "unscanned": results.unscanned,
+                "columns": ["index", *results.columns],
+                "rows": json.loads(scan_results.page_to_json(page)),
+            }
+        ),
+        mimetype="application/json",
+    )
+
+
+@app.route("/api/scan/stats")
+def api_scan_stats():
+    return jsonify(
+        scan_flights=options_manager.SCAN_FLIGHTS.stats(),
+        scan_results_cache=scan_results_cache.stats(),
     )
 
 
@@ -0,0 +1,129 @@
+import datetime
+import logging
+import typing
+import urllib.parse
+
+import aiohttp
+import oauthlib.oauth1
+import xmltodict
+import yarl
+
+log = logging.getLogger(__name__)
+ETRADE_MARKET_URL = "https://api.etrade.com/v1/market/"
+DEFAULT_CONNECTION_LIMIT = 64
+
+
+class AsyncETradeMarket:
+    """OAuth1-signed asyncio counterpart of ``pyetrade.ETradeMarket``.
+
+    Responses are parsed with ``xmltodict`` exactly like pyetrade so both clients
+    return the same structures. Every request goes through one pooled session.
+    """
+
+    def __init__(
+        self,
+        consumer_key: str,
+        consumer_secret: str,
+        oauth_token: str,
+        oauth_secret: str,
+        base_url: str = ETRADE_MARKET_URL,
+        connection_limit: int = DEFAULT_CONNECTION_LIMIT,
+    ):
+        self.base_url = base_url
+        self.connection_limit = connection_limit
+        self.client = oauthlib.oauth1.Client(
+            consumer_key,
+            client_secret=consumer_secret,
+            resource_owner_key=oauth_token,
+            resource_owner_secret=oauth_secret,
+            signature_type=oauthlib.oauth1.SIGNATURE_TYPE_AUTH_HEADER,
+        )
+        self._session: typing.Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.connection_limit, keepalive_timeout=30
+                )
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _get(self, path: str, params: typing.Dict[str, str]) -> typing.Dict:
+        url = self.base_url + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        signed_url, headers, _ = self.client.sign(url, http_method="GET")
+        log.debug(signed_url)
+
+        # the url is already signed, so it must be sent without re-encoding
+        async with self.session.get(
+            yarl.URL(signed_url, encoded=True), headers=headers
+        ) as response:
+            text = await response.text()
+            if not response.ok:
+                # keep the body, which says e.g. whether a symbol is invalid
+                raise aiohttp.ClientResponseError(
+                    response.request_info,
+                    response.history,
+                    status=response.status,
+                    message=text or response.reason or "",
+                    headers=response.headers,
+                )
+        log.debug(text)
+        return xmltodict.parse(text)
+
+    async def get_quote(
+        self,
+        symbols: typing.List[str],
+        require_earnings_date: typing.Optional[bool] = None,
+    ) -> typing.Dict:
+        params = {"requireEarningsDate": "true"} if require_earnings_date else {}
+        return await self._get("quote/" + ",".join(symbols), params)
+
+    async def get_option_expire_date(self, underlier: str) -> typing.Dict:
+        return await self._get(
+            "optionexpiredate", {"symbol": underlier, "expiryType": "ALL"}
+        )
+
+    async def get_option_chains(
+        self,
+        underlier: str,
+        expiry_date: typing.Optional[datetime.date] = None,
+        skip_adjusted: typing.Optional[bool] = None,
+        chain_type: typing.Optional[str] = None,
+        strike_price_near: typing.Optional[float] = None,
+        no_of_strikes: typing.Optional[int] = None,
+        option_category: typing.Optional[str] = None,
+        price_type: typing.Optional[str] = None,
+    ) -> typing.Dict:
+        params = {"symbol": underlier}
+        if expiry_date is not None:
+            params["expiryDay"] = f"{expiry_date.day:02d}"
+            params["expiryMonth"] = f"{expiry_date.month:02d}"
+            params["expiryYear"] = f"{expiry_date.year:04d}"
+        if strike_price_near is not None:
+            params["strikePriceNear"] = f"{strike_price_near:0.2f}"
+        if chain_type is not None:
+            params["chainType"] = chain_type.upper()
+        if option_category is not None:
+            params["optionCategory"] = option_category.upper()
+        if price_type is not None:
+            params["priceType"] = price_type.upper()
+        if skip_adjusted is not None:
+            params["skipAdjusted"] = str(skip_adjusted)
+        if no_of_strikes is not None:
+            params["noOfStrikes"] = str(no_of_strikes)
+        return await self._get("optionchains", params)
@@ -0,0 +1,441 @@
+import asyncio
+import datetime
+import logging
+import time
+import typing
+
+import aiohttp
+import pandas as pd
+from tenacity import (
+    retry,
+    stop_after_attempt,
+    wait_exponential,
+    retry_if_exception,
+)
+
+from option_chains import metrics
+from option_chains.async_market import AsyncETradeMarket, ETRADE_MARKET_URL
+from option_chains.cache import Cache
+from option_chains.circuit_breaker import CircuitBreaker
+from option_chains.options_manager import (
+    BaseOptionsManager,
+    MarketData,
+    BUDGET_ROUND_SIZE,
+    DEADLINE_MARGIN,
+    MAX_QUOTE_SYMBOLS,
+    RANK_COLUMNS,
+)
+from option_chains.puts import Puts
+from option_chains.rate_limiter import RateLimiter, is_throttle_error
+from option_chains.snapshot_store import SnapshotStore
+from option_chains.top_k import TopK
+
+log = logging.getLogger(__name__)
+DEFAULT_MAX_IN_FLIGHT = 32
+
+
+def _is_retryable(ex: BaseException) -> bool:
+    # a bad request (e.g. an unknown symbol) fails the same way every attempt
+    return isinstance(ex, aiohttp.ClientResponseError) and is_throttle_error(ex)
+
+
+class AsyncOptionsManager(BaseOptionsManager):
+    def __init__(
+        self,
+        consumer_key: str,
+        consumer_secret: str,
+        oauth_token: str,
+        oauth_secret: str,
+        quote_cache: typing.Optional[Cache] = None,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        base_url: str = ETRADE_MARKET_URL,
+        rate_limiter: typing.Optional[RateLimiter] = None,
+        chain_cache: typing.Optional[Cache] = None,
+        expiry_cache: typing.Optional[Cache] = None,
+        snapshot_store: typing.Optional[SnapshotStore] = None,
+        failed_tickers: typing.Optional[Cache] = None,
+        circuit_breaker: typing.Optional[CircuitBreaker] = None,
+    ):
+        super().__init__(
+            quote_cache=quote_cache,
+            rate_limiter=rate_limiter,
+            chain_cache=chain_cache,
+            expiry_cache=expiry_cache,
+            snapshot_store=snapshot_store,
+            failed_tickers=failed_tickers,
+            circuit_breaker=circuit_breaker,
+        )
+        self.max_in_flight = max_in_flight
+        self.market = AsyncETradeMarket(
+            consumer_key,
+            consumer_secret,
+            oauth_token,
+            oauth_secret,
+            base_url=base_url,
+            connection_limit=max_in_flight,
+        )
+
+    async def close(self):
+        await self.market.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _request(self, method: typing.Callable, *args, **kwargs):
+        ticker = kwargs.get("underlier")
+        # an open circuit fails fast, without waiting on the limiter
+        with self.circuit_breaker.guard(method.__name__):
+            metrics.API_CALLS.inc(endpoint=method.__name__)
+            start = time.perf_counter()
+            async with self.rate_limiter.limit_async():
+                metrics.observe("rate_limit_wait", time.perf_counter() - start, ticker)
+                with metrics.span(method.__name__, ticker):
+                    return await method(*args, **kwargs)
+
+    async def get_all_options_info(
+        self,
+        sector="Communication Services",
+        sub_sector="Comm - Media & Ent",
+        percentile_of_52_range: int = 25,
+        min_strike: float = 30,
+        max_strike: float = 20,
+        month_look_ahead: int = 3,
+        min_volume: int = 1,
+        min_open_interest: int = 1,
+        min_annualized_return: float = 0.0,
+        include_next_earnings_date: bool = True,
+        blue_chip_only: bool = False,
+        time_budget: typing.Optional[float] = None,
+        format_values: bool = True,
+        top_k: typing.Optional[int] = None,
+        rank_by: str = "annualizedReturn",
+    ):
+        """Same as OptionsManager.get_all_options_info, with the same rows.
+
+        Neither scan orders its rows, except best first in top-K mode, so sort
+        them before comparing the two.
+        """
+        assert rank_by in RANK_COLUMNS, f"rank_by should be one of {RANK_COLUMNS}"
+        deadline = None
+        if time_budget:
+            deadline = time.monotonic() + time_budget - DEADLINE_MARGIN
+        tickers = self._get_scan_tickers(sector, sub_sector, blue_chip_only)
+
+        # limits every request made during the scan, not just the chain requests
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        try:
+            all_market_data, unquoted = await self._get_market_data_bulk(
+                tickers, semaphore
+            )
+        except Exception as ex:
+            log.error(f"Failed to fetch quotes for {len(tickers)} tickers: {ex}")
+            metrics.SKIPPED_TICKERS.inc(
+                len(tickers), stage="quote", reason=type(ex).__name__
+            )
+            return pd.DataFrame()
+        # tickers whose quote request failed were already counted as skipped
+        failed = set(unquoted)
+        tickers = self._screen_tickers(
+            [ticker for ticker in tickers if ticker not in failed],
+            all_market_data,
+            percentile_of_52_range,
+        )
+        if deadline is not None:
+            # requests wait on the semaphore in ticker order, so the best get
+            # scanned first
+            tickers = self._prioritize_tickers(tickers, all_market_data)
+
+        valid_strikes = {
+            ticker: self.get_valid_strikes(
+                all_market_data[ticker].market_price, min_strike, max_strike
+            )
+            for ticker in tickers
+        }
+
+        unscanned = set()
+        # in top-K mode only the best puts are kept
+        top = TopK(top_k) if top_k else None
+
+        def out_of_budget(ticker):
+            if deadline is None or time.monotonic() < deadline:
+                return False
+            unscanned.add(ticker)
+            return True
+
+        async def expiry_helper(ticker):
+            try:
+                async with semaphore:
+                    if out_of_budget(ticker):
+                        return []
+                    return await self.get_expiry_dates(
+                        ticker, month_look_ahead, include_next_earnings_date
+                    )
+            except Exception as ex:
+                log.error(f"Skipping ticker '{ticker}' due to error: {ex}")
+                self._skip_ticker_on_error(ticker, "expiry_dates", ex)
+                return []
+
+        async def chain_helper(ticker, expiry_date):
+            try:
+                async with semaphore:
+                    if out_of_budget(ticker):
+                        return ticker, expiry_date, None
+                    if top is None:
+                        puts = await self.get_puts(
+                            ticker,
+                            expiry_date,
+                            all_market_data[ticker].market_price,
+                            valid_strikes[ticker],
+                        )
+                    else:
+                        puts = await self.get_top_puts(
+                            ticker,
+                            expiry_date,
+                            all_market_data[ticker].market_price,
+                            valid_strikes[ticker],
+                            top_k,
+                            rank_by=rank_by,
+                            min_volume=min_volume,
+                            min_open_interest=min_open_interest,
+                            min_annualized_return=min_annualized_return,
+                        )
+            except Exception as ex:
+                log.error(f"Skipping {ticker} {expiry_date} due to error: {ex}")
+                self._skip_ticker_on_error(ticker, "chain", ex)
+                puts = None
+            return ticker, expiry_date, puts
+
+        async def ticker_helper(ticker):
+            # a ticker's chains are requested as soon as its expiry dates arrive
+            dates = await expiry_helper(ticker)
+            chains = await asyncio.gather(
+                *[chain_helper(ticker, expiry_date) for expiry_date in dates]
+            )
+            if top is not None:
+                # a finished ticker's puts go on the heap and are dropped
+                self._push_top_puts(top, ticker, dates, chains, rank_by=rank_by)
+                chains = []
+            return dates, chains
+
+        # with a time budget, tickers are scanned in rounds in priority order, so
+        # the best ones finish before the expiry dates of the rest are requested
+        round_size = len(tickers)
+        if deadline is not None:
+            round_size = self.max_in_flight * BUDGET_ROUND_SIZE
+
+        expiry_dates = {}
+        chains = []
+        for i in range(0, len(tickers), max(round_size, 1)):
+            round_tickers = tickers[i : i + round_size]
+            results = await asyncio.gather(
+                *[ticker_helper(ticker) for ticker in round_tickers]
+            )
+            for ticker, (dates, ticker_chains) in zip(round_tickers, results):
+                expiry_dates[ticker] = dates
+                chains.extend(ticker_chains)
+        log.info(f"Requested {sum(map(len, expiry_dates.values()))} option chains.")
+
+        if top is not None:
+            log.info(f"Kept the top {len(top)} of {top.pushed} puts by {rank_by}.")
+            df = self._get_top_frame(top, all_market_data)
+        else:
+            df = self._get_scan_frame(
+                self._collect_puts(expiry_dates, chains),
+                all_market_data,
+                min_volume=min_volume,
+                min_open_interest=min_open_interest,
+                min_annualized_return=min_annualized_return,
+            )
+        if unscanned:
+            log.warning(
+                f"Time budget of {time_budget}s ran out before {len(unscanned)} "
+                "tickers were scanned."
+            )
+            metrics.SKIPPED_TICKERS.inc(
+                len(unscanned), stage="scan", reason="time_budget"
+            )
+        if unscanned or unquoted:
+            # in priority order, then the tickers whose quotes couldn't be fetched
+            df.attrs["unscanned"] = [
+                *(t for t in tickers if t in unscanned),
+                *unquoted,
+            ]
+        df = self._label_options_frame(df)
+        if df.empty or not format_values:
+            return df
+        return self.format_display_values(df)
+
+    @retry(
+        stop=stop_after_attempt(10),
+        wait=wait_exponential(multiplier=0.1),
+        reraise=True,
+        before_sleep=metrics.count_retry,
+        retry=retry_if_exception(_is_retryable),
+    )
+    async def _get_chain(
+        self,
+        ticker: str,
+        expiry_date: datetime.date,
+        valid_strikes: typing.Set[int],
+    ) -> typing.Tuple[typing.Dict, bool]:
+        """The chain's response, and whether it was fetched rather than cached."""
+        response = self._get_cached_chain(ticker, expiry_date, valid_strikes)
+        if response is not None:
+            return response, False
+        response = await self._request(
+            self.market.get_option_chains,
+            underlier=ticker,
+            expiry_date=expiry_date,
+            **self.get_chain_params(valid_strikes),
+        )
+        self._cache_chain(ticker, expiry_date, valid_strikes, response)
+        return response, True
+
+    async def get_puts(
+        self,
+        ticker: str,
+        expiry_date: datetime.date,
+        market_price: float,
+        valid_strikes: typing.Set[int],
+    ) -> typing.Optional[Puts]:
+        if not valid_strikes:
+            return self._empty_puts()
+
+        response, fetched = await self._get_chain(ticker, expiry_date, valid_strikes)
+        with metrics.span("parse_puts", ticker):
+            puts = self._parse_puts(
+                ticker, expiry_date, response, market_price, valid_strikes
+            )
+        if fetched:
+            self._snapshot_chain(ticker, puts)
+        return puts
+
+    async def get_top_puts(
+        self,
+        ticker: str,
+        expiry_date: datetime.date,
+        market_price: float,
+        valid_strikes: typing.Set[int],
+        top_k: int,
+        **filters,
+    ) -> typing.Optional[Puts]:
+        """Like get_puts, but only the chain's best top_k puts that pass the
+        filters (see _rank_puts)."""
+        if not valid_strikes:
+            return self._empty_puts()
+
+        response, fetched = await self._get_chain(ticker, expiry_date, valid_strikes)
+        with metrics.span("rank_puts", ticker):
+            return self._rank_puts(
+                ticker,
+                expiry_date,
+                response,
+                market_price,
+                valid_strikes,
+                top_k,
+                snapshot=fetched,
+                **filters,
+            )
+
+    async def get_market_data(self, ticker: str) -> MarketData:
+        market_data = self.quote_cache.get(ticker)
+        if market_data is None:
+            # unlike in a bulk fetch, an error is raised to the caller
+            market_data = (await self._fetch_market_data([ticker])).get(ticker)
+            if market_data is None:
+                raise ValueError(f"No quote data returned for ticker '{ticker}'")
+            self.quote_cache.set(ticker, market_data)
+        return market_data
+
+    async def get_market_data_bulk(
+        self,
+        tickers: typing.Iterable[str],
+        semaphore: typing.Optional[asyncio.Semaphore] = None,
+    ) -> typing.Dict[str, MarketData]:
+        """Quotes of the tickers that could be fetched, see _get_market_data_bulk."""
+        return (await self._get_market_data_bulk(tickers, semaphore))[0]
+
+    async def _get_market_data_bulk(
+        self,
+        tickers: typing.Iterable[str],
+        semaphore: typing.Optional[asyncio.Semaphore] = None,
+    ) -> typing.Tuple[typing.Dict[str, MarketData], typing.List[str]]:
+        """Quotes of tickers, cached or fetched MAX_QUOTE_SYMBOLS at a time, and
+        the tickers of the requests that failed. A failed request is logged and
+        skipped, so the other tickers are still quoted."""
+        semaphore = semaphore or asyncio.Semaphore(self.max_in_flight)
+
+        result = {}
+        missing = []
+        for ticker in dict.fromkeys(tickers):
+            market_data = self.quote_cache.get(ticker)
+            if market_data is None:
+                missing.append(ticker)
+            else:
+                result[ticker] = market_data
+
+        async def helper(chunk):
+            try:
+                async with semaphore:
+                    return await self._fetch_market_data(chunk)
+            except Exception as ex:
+                self._skip_quote_chunk(chunk, ex)
+                return None
+
+        chunks = [
+            missing[i : i + MAX_QUOTE_SYMBOLS]
+            for i in range(0, len(missing), MAX_QUOTE_SYMBOLS)
+        ]
+        unquoted = []
+        fetched_chunks = await asyncio.gather(*[helper(chunk) for chunk in chunks])
+        for chunk, fetched in zip(chunks, fetched_chunks):
+            if fetched is None:
+                unquoted.extend(chunk)
+                continue
+            for ticker, market_data in fetched.items():
+                self.quote_cache.set(ticker, market_data)
+                result[ticker] = market_data
+
+        return result, unquoted
+
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(multiplier=0.1),
+        reraise=True,
+        before_sleep=metrics.count_retry,
+        retry=retry_if_exception(_is_retryable),
+    )
+    async def _fetch_market_data(
+        self, tickers: typing.List[str]
+    ) -> typing.Dict[str, MarketData]:
+        response = await self._request(
+            self.market.get_quote, tickers, require_earnings_date=True
+        )
+        return self._parse_quotes(tickers, response)
+
+    @retry(
+        stop=stop_after_attempt(10),
+        wait=wait_exponential(multiplier=0.1),
+        reraise=True,
+        before_sleep=metrics.count_retry,
+        retry=retry_if_exception(_is_retryable),
+    )
+    async def get_expiry_dates(
+        self,
+        ticker: str,
+        month_look_ahead: int = 3,
+        include_next_earnings_date: bool = True,
+    ):
+        response = self.expiry_cache.get(ticker)
+        if response is None:
+            response = await self._request(
+                self.market.get_option_expire_date, underlier=ticker
+            )
+            self._cache_expiry_dates(ticker, response)
+        return self._parse_expiry_dates(
+            ticker, response, month_look_ahead, include_next_earnings_date
+        )
@@ -0,0 +1,83 @@
+"""Compare full option chain downloads against strike-window requests.
+
+Usage:
+    OAUTH_TOKEN=... OAUTH_SECRET=... python -m option_chains.benchmarks.chain_window GOOG SPY
+"""
+
+import argparse
+import logging
+import os
+import time
+
+from option_chains import options_manager, constants
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--min-strike", type=float, default=30)
+    parser.add_argument("--max-strike", type=float, default=20)
+    parser.add_argument("--lookahead", type=int, default=3)
+    parser.add_argument("--base-url", help="market API url, e.g. a local stub server")
+    args = parser.parse_args()
+
+    manager = options_manager.OptionsManager(
+        consumer_key=constants.CONSUMER_KEY,
+        consumer_secret=constants.CONSUMER_SECRET,
+        oauth_token=os.environ["OAUTH_TOKEN"],
+        oauth_secret=os.environ["OAUTH_SECRET"],
+    )
+    if args.base_url:
+        manager.market.base_url = args.base_url
+
+    response_bytes = []
+    manager.market.session.hooks["response"].append(
+        lambda response, *_, **__: response_bytes.append(len(response.content))
+    )
+
+    # both modes call the market client directly, so neither goes through the
+    # manager's rate limiter, retries or chain cache
+    def full_chain(ticker, date, market_price, valid_strikes):
+        response = manager.market.get_option_chains(underlier=ticker, expiry_date=date)
+        return manager._parse_puts(ticker, date, response, market_price, valid_strikes)
+
+    def window_chain(ticker, date, market_price, valid_strikes):
+        response = manager.market.get_option_chains(
+            underlier=ticker,
+            expiry_date=date,
+            **manager.get_chain_params(valid_strikes),
+        )
+        return manager._parse_puts(ticker, date, response, market_price, valid_strikes)
+
+    print(
+        f"{'ticker':8}{'mode':8}{'requests':>10}{'bytes':>12}{'puts':>8}"
+        f"{'seconds':>10}"
+    )
+    for ticker in args.tickers:
+        market_data = manager.get_market_data(ticker)
+        valid_strikes = manager.get_valid_strikes(
+            market_data.market_price, args.min_strike, args.max_strike
+        )
+        if not valid_strikes:
+            print(f"{ticker:8}no strikes in the window")
+            continue
+        dates = manager.get_expiry_dates(ticker, args.lookahead)
+
+        for mode, fetch in [("full", full_chain), ("window", window_chain)]:
+            response_bytes.clear()
+            start = time.perf_counter()
+            puts = 0
+            for date in dates:
+                chain = fetch(ticker, date, market_data.market_price, valid_strikes)
+                puts += 0 if chain is None else len(chain)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{ticker:8}{mode:8}{len(response_bytes):>10}{sum(response_bytes):>12,}"
+                f"{puts:>8}{elapsed:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
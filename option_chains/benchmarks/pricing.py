@@ -0,0 +1,64 @@
+"""Time the vectorized put pricing, greeks and implied volatility solve.
+
+Usage:
+    python -m option_chains.benchmarks.pricing --puts 1000000 --repeat 3
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from option_chains import pricing
+
+
+def make_puts(count: int, seed: int = 0):
+    """Random puts spread like a scan's: 40-120 % of spot, up to four months out."""
+    rng = np.random.default_rng(seed)
+    spot = rng.uniform(5, 500, count)
+    strike = spot * rng.uniform(0.4, 1.2, count)
+    years = rng.integers(1, 120, count) / pricing.DAYS_PER_YEAR
+    iv = rng.uniform(0.05, 1.5, count)
+    return spot, strike, years, iv
+
+
+def best_of(repeat: int, func, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--puts", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    spot, strike, years, iv = make_puts(args.puts)
+    price = pricing.put_price(spot, strike, years, iv)
+
+    print(f"{'stage':12}{'seconds':>10}{'puts/sec':>14}")
+    stages = [
+        ("price", pricing.put_price, (spot, strike, years, iv)),
+        ("greeks", pricing.put_greeks, (spot, strike, years, iv)),
+        ("iv", pricing.implied_volatility, (price, spot, strike, years)),
+    ]
+    results = {}
+    for stage, func, func_args in stages:
+        elapsed, results[stage] = best_of(args.repeat, func, *func_args)
+        print(f"{stage:12}{elapsed:>10.3f}{args.puts / elapsed:>14,.0f}")
+
+    solved = results["iv"]
+    found = ~np.isnan(solved)
+    error = np.abs(pricing.put_price(spot, strike, years, solved) - price)[found]
+    print(
+        f"\nsolved {found.mean():.2%} of puts (the rest are priced below the "
+        f"MIN_IV bound), max price error ${error.max():.2e}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""Record E*Trade market responses to a fixture file and replay them from a local stub server.
+
+Usage:
+    OAUTH_TOKEN=... OAUTH_SECRET=... python -m option_chains.benchmarks.replay record fixtures.json --sector Technology
+    python -m option_chains.benchmarks.replay serve fixtures.json --port 8765 --latency 0.05 --error-rate 0.01
+
+Point a manager at the stub with ``manager.market.base_url = "http://127.0.0.1:8765/v1/market/"``.
+"""
+
+import argparse
+import asyncio
+import collections
+import datetime
+import json
+import logging
+import os
+import random
+import threading
+import typing
+
+import xmltodict
+from aiohttp import web
+
+from option_chains import options_manager, constants
+
+log = logging.getLogger(__name__)
+DEFAULT_PORT = 8765
+
+
+def _as_list(value) -> typing.List:
+    # a single element is not wrapped in a list by the xml parser
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class Fixtures:
+    """Recorded quote, expiry date and option chain responses.
+
+    Quotes are kept per symbol and chains per (symbol, expiry) as the union of
+    every strike recorded, so the stub can answer requests that are chunked or
+    windowed differently from the ones that were recorded.
+    """
+
+    def __init__(self):
+        self.quotes: typing.Dict[str, typing.Dict] = {}
+        self.expiry_dates: typing.Dict[str, typing.Dict] = {}
+        self.chains: typing.Dict[str, typing.Dict[str, typing.Dict]] = {}
+
+    @staticmethod
+    def chain_key(symbol: str, expiry_date: datetime.date) -> str:
+        return f"{symbol.upper()} {expiry_date.isoformat()}"
+
+    def add_quotes(self, response: typing.Dict):
+        for quote in _as_list(response["QuoteResponse"].get("QuoteData")):
+            self.quotes[quote["Product"]["symbol"].upper()] = quote
+
+    def add_expiry_dates(self, symbol: str, response: typing.Dict):
+        self.expiry_dates[symbol.upper()] = response
+
+    def add_chain(self, symbol: str, expiry_date: datetime.date, response: typing.Dict):
+        pairs = self.chains.setdefault(self.chain_key(symbol, expiry_date), {})
+        for pair in _as_list(response["OptionChainResponse"].get("OptionPair")):
+            option = pair.get("Put") or pair.get("Call")
+            pairs[option["strikePrice"]] = pair
+
+    def get_quote(self, symbols: typing.List[str]) -> typing.Dict:
+        quotes = [self.quotes[s.upper()] for s in symbols if s.upper() in self.quotes]
+        return {"QuoteResponse": {"QuoteData": quotes} if quotes else {}}
+
+    def get_option_expire_date(self, symbol: str) -> typing.Optional[typing.Dict]:
+        return self.expiry_dates.get(symbol.upper())
+
+    def has_symbol(self, symbol: str) -> bool:
+        symbol = symbol.upper()
+        return symbol in self.quotes or symbol in self.expiry_dates
+
+    def get_option_chains(
+        self,
+        symbol: str,
+        expiry_date: datetime.date,
+        chain_type: typing.Optional[str] = None,
+        strike_price_near: typing.Optional[float] = None,
+        no_of_strikes: typing.Optional[int] = None,
+    ) -> typing.Dict:
+        pairs = list(self.chains.get(self.chain_key(symbol, expiry_date), {}).values())
+        if strike_price_near is not None and no_of_strikes:
+            # the api returns the strikes nearest to strikePriceNear
+            pairs.sort(key=lambda pair: abs(self._strike(pair) - strike_price_near))
+            pairs = pairs[:no_of_strikes]
+        pairs.sort(key=self._strike)
+
+        if chain_type in ("PUT", "CALL"):
+            side = chain_type.title()
+            pairs = [{side: pair[side]} for pair in pairs if side in pair]
+        # xml has no empty list, and an empty root parses to None, so no pairs
+        # are sent as an empty OptionPair element
+        return {"OptionChainResponse": {"OptionPair": pairs or None}}
+
+    @staticmethod
+    def _strike(pair: typing.Dict) -> float:
+        return float((pair.get("Put") or pair.get("Call"))["strikePrice"])
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "quotes": self.quotes,
+                    "expiry_dates": self.expiry_dates,
+                    "chains": self.chains,
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "Fixtures":
+        with open(path) as f:
+            data = json.load(f)
+        fixtures = cls()
+        fixtures.quotes = data["quotes"]
+        fixtures.expiry_dates = data["expiry_dates"]
+        fixtures.chains = data["chains"]
+        return fixtures
+
+
+class RecordingMarket:
+    """Wraps a ``pyetrade.ETradeMarket`` and records every response it returns."""
+
+    def __init__(self, market, fixtures: Fixtures):
+        self.market = market
+        self.fixtures = fixtures
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.market, name)
+
+    def get_quote(self, symbols, *args, **kwargs):
+        response = self.market.get_quote(symbols, *args, **kwargs)
+        with self._lock:
+            self.fixtures.add_quotes(response)
+        return response
+
+    def get_option_expire_date(self, underlier, *args, **kwargs):
+        response = self.market.get_option_expire_date(underlier, *args, **kwargs)
+        with self._lock:
+            self.fixtures.add_expiry_dates(underlier, response)
+        return response
+
+    def get_option_chains(self, underlier, expiry_date=None, *args, **kwargs):
+        response = self.market.get_option_chains(
+            underlier, expiry_date, *args, **kwargs
+        )
+        with self._lock:
+            self.fixtures.add_chain(underlier, expiry_date, response)
+        return response
+
+
+def make_stub_app(
+    fixtures: Fixtures,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    seed: typing.Optional[int] = None,
+) -> web.Application:
+    """aiohttp app serving fixtures on the E*Trade market api paths.
+
+    Every response is delayed by ``latency`` seconds plus up to ``jitter``, and
+    ``error_rate`` of requests fail with ``error_status``. Request counts per
+    endpoint are served from ``/stats``.
+    """
+    rng = random.Random(seed)
+    stats = collections.Counter()
+
+    def xml(data: typing.Dict) -> web.Response:
+        return web.Response(
+            text=xmltodict.unparse(data), content_type="application/xml"
+        )
+
+    async def simulate(endpoint: str) -> typing.Optional[web.Response]:
+        """Wait out the latency, then return an error response for a failure."""
+        stats[endpoint] += 1
+        await asyncio.sleep(latency + rng.uniform(0, jitter))
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            return web.Response(status=error_status, text="Simulated error")
+        return None
+
+    def invalid_symbol(symbol: str) -> web.Response:
+        # E*Trade's error response for a symbol it doesn't know
+        return web.Response(
+            status=400,
+            text=xmltodict.unparse(
+                {"Error": {"message": f"The symbol {symbol} is invalid."}}
+            ),
+            content_type="application/xml",
+        )
+
+    async def quote(request):
+        error = await simulate("quote")
+        if error is not None:
+            return error
+        return xml(fixtures.get_quote(request.match_info["symbols"].split(",")))
+
+    async def expiry_dates(request):
+        error = await simulate("optionexpiredate")
+        if error is not None:
+            return error
+        symbol = request.query["symbol"]
+        response = fixtures.get_option_expire_date(symbol)
+        if response is None:
+            return invalid_symbol(symbol)
+        return xml(response)
+
+    async def chains(request):
+        error = await simulate("optionchains")
+        if error is not None:
+            return error
+        query = request.query
+        if not fixtures.has_symbol(query["symbol"]):
+            return invalid_symbol(query["symbol"])
+        expiry_date = datetime.date(
+            int(query["expiryYear"]), int(query["expiryMonth"]), int(query["expiryDay"])
+        )
+        strike_price_near = query.get("strikePriceNear")
+        no_of_strikes = query.get("noOfStrikes")
+        return xml(
+            fixtures.get_option_chains(
+                query["symbol"],
+                expiry_date,
+                chain_type=query.get("chainType"),
+                strike_price_near=(
+                    None if strike_price_near is None else float(strike_price_near)
+                ),
+                no_of_strikes=None if no_of_strikes is None else int(no_of_strikes),
+            )
+        )
+
+    async def get_stats(request):
+        return web.json_response(dict(stats))
+
+    app = web.Application()
+    app["stats"] = stats
+    app.add_routes(
+        [
+            web.get("/v1/market/quote/{symbols}", quote),
+            web.get("/v1/market/optionexpiredate", expiry_dates),
+            web.get("/v1/market/optionchains", chains),
+            web.get("/stats", get_stats),
+        ]
+    )
+    return app
+
+
+def start_stub_server(
+    app: web.Application, host: str = "127.0.0.1", port: int = DEFAULT_PORT
+) -> typing.Callable:
+    """Serve app from a background thread and return a function that stops it."""
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, host, port).start())
+    thread = threading.Thread(target=loop.run_forever, name="stub", daemon=True)
+    thread.start()
+
+    def stop():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.run_until_complete(runner.cleanup())
+        loop.close()
+
+    return stop
+
+
+def record(args):
+    manager = options_manager.OptionsManager(
+        consumer_key=constants.CONSUMER_KEY,
+        consumer_secret=constants.CONSUMER_SECRET,
+        oauth_token=os.environ["OAUTH_TOKEN"],
+        oauth_secret=os.environ["OAUTH_SECRET"],
+    )
+    fixtures = Fixtures.load(args.fixtures) if args.append else Fixtures()
+    manager.market = RecordingMarket(manager.market, fixtures)
+
+    for ticker in args.tickers:
+        manager.get_options_info(ticker, month_look_ahead=args.lookahead)
+    if args.sector or args.sub_sector or not args.tickers:
+        # a percentile of 100 records every ticker, not just the screened ones
+        manager.get_all_options_info(
+            sector=args.sector,
+            sub_sector=args.sub_sector,
+            percentile_of_52_range=100,
+            month_look_ahead=args.lookahead,
+        )
+
+    fixtures.save(args.fixtures)
+    print(
+        f"Recorded {len(fixtures.quotes)} quotes, {len(fixtures.expiry_dates)} "
+        f"expiry date lists and {len(fixtures.chains)} chains to {args.fixtures}"
+    )
+
+
+def serve(args):
+    app = make_stub_app(
+        Fixtures.load(args.fixtures),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    web.run_app(app, host=args.host, port=args.port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="record live responses")
+    record_parser.add_argument("fixtures")
+    record_parser.add_argument("--tickers", nargs="*", default=[])
+    record_parser.add_argument("--sector")
+    record_parser.add_argument("--sub-sector")
+    record_parser.add_argument("--lookahead", type=int, default=3)
+    record_parser.add_argument(
+        "--append", action="store_true", help="add to an existing fixture file"
+    )
+    record_parser.set_defaults(run=record)
+
+    serve_parser = subparsers.add_parser("serve", help="replay recorded responses")
+    serve_parser.add_argument("fixtures")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    serve_parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    serve_parser.add_argument("--error-rate", type=float, default=0.0)
+    serve_parser.add_argument("--error-status", type=int, default=503)
+    serve_parser.add_argument("--seed", type=int)
+    serve_parser.set_defaults(run=serve)
+
+    logging.basicConfig(level=logging.WARNING)
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Time single ticker, sub-sector and all-sector scans against recorded fixtures.
+
+Usage:
+    python -m option_chains.benchmarks.scan fixtures.json --latency 0.05 --error-rate 0.01
+    OAUTH_TOKEN=... OAUTH_SECRET=... python -m option_chains.benchmarks.scan --base-url https://api.etrade.com/v1/market/
+"""
+
+import argparse
+import logging
+import os
+import time
+import tracemalloc
+
+from option_chains import options_manager, constants
+from option_chains.benchmarks import replay
+from option_chains.cache import TTLCache
+from option_chains.circuit_breaker import CircuitBreaker
+from option_chains.rate_limiter import RateLimiter
+from option_chains.single_flight import SingleFlight
+
+logging.basicConfig(level=logging.WARNING)
+SCENARIOS = ["ticker", "sub_sector", "all"]
+
+
+def make_manager(args) -> options_manager.OptionsManager:
+    # fresh caches, limiter and breaker per scenario so every run starts cold
+    manager = options_manager.OptionsManager(
+        consumer_key=constants.CONSUMER_KEY,
+        consumer_secret=constants.CONSUMER_SECRET,
+        oauth_token=os.environ.get("OAUTH_TOKEN", "stub"),
+        oauth_secret=os.environ.get("OAUTH_SECRET", "stub"),
+        quote_cache=TTLCache(ttl=options_manager.QUOTE_CACHE_TTL),
+        chain_cache=TTLCache(ttl=options_manager.CHAIN_CACHE_TTL, maxsize=8192),
+        expiry_cache=TTLCache(ttl=options_manager.EXPIRY_CACHE_TTL, maxsize=2048),
+        rate_limiter=RateLimiter(rate=args.rate, max_rate=max(args.rate, 50)),
+        scan_flights=SingleFlight(),
+        failed_tickers=TTLCache(ttl=options_manager.FAILED_TICKER_TTL),
+        circuit_breaker=CircuitBreaker(),
+        thread_count=args.threads,
+    )
+    manager.market.base_url = args.base_url
+    return manager
+
+
+def run_scenario(args, scenario: str):
+    manager = make_manager(args)
+    if scenario == "ticker":
+        scan = lambda: manager.get_options_info(args.ticker)
+    elif scenario == "sub_sector":
+        scan = lambda: manager.get_all_options_info(
+            sector=None, sub_sector=args.sub_sector, top_k=args.top_k
+        )
+    else:
+        scan = lambda: manager.get_all_options_info(
+            sector=None, sub_sector=None, top_k=args.top_k
+        )
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = scan()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "scenario": scenario,
+        "requests": manager.rate_limiter.requests,
+        "throttled": manager.rate_limiter.throttle_events,
+        "rows": len(result),
+        "seconds": elapsed,
+        "peak_mb": peak / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="?", help="replay these from a stub server")
+    parser.add_argument("--base-url", help="market API url, instead of fixtures")
+    parser.add_argument("--ticker", default="GOOG")
+    parser.add_argument("--sub-sector", default="Tech - Semiconductor")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--top-k", type=int, help="keep only the best puts in sector scans"
+    )
+    parser.add_argument("--rate", type=float, default=50, help="requests per second")
+    parser.add_argument(
+        "--threads", type=int, default=options_manager.DEFAULT_THREAD_COUNT
+    )
+    parser.add_argument("--port", type=int, default=replay.DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="stub seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub errors")
+    args = parser.parse_args()
+
+    if not args.fixtures and not args.base_url:
+        parser.error("either fixtures or --base-url is required")
+
+    stop = None
+    if args.fixtures:
+        stop = replay.start_stub_server(
+            replay.make_stub_app(
+                replay.Fixtures.load(args.fixtures),
+                latency=args.latency,
+                jitter=args.jitter,
+                error_rate=args.error_rate,
+                seed=0,
+            ),
+            port=args.port,
+        )
+        args.base_url = f"http://127.0.0.1:{args.port}/v1/market/"
+
+    try:
+        print(
+            f"{'scenario':12}{'requests':>10}{'throttled':>10}{'rows':>8}"
+            f"{'seconds':>10}{'peak MB':>10}"
+        )
+        for scenario in args.scenarios:
+            for _ in range(args.repeat):
+                result = run_scenario(args, scenario)
+                print(
+                    f"{result['scenario']:12}{result['requests']:>10}"
+                    f"{result['throttled']:>10}{result['rows']:>8}"
+                    f"{result['seconds']:>10.3f}{result['peak_mb']:>10.1f}"
+                )
+    finally:
+        if stop is not None:
+            stop()
+
+
+if __name__ == "__main__":
+    main()
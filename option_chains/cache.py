@@ -0,0 +1,251 @@
+import abc
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import typing
+import zlib
+from collections import OrderedDict
+
+_MISSING = object()
+COMPRESS_MIN_BYTES = 1024  # pickles smaller than this are stored as is
+EVICT_EVERY = 64  # sets between expiry and size eviction passes
+
+
+class Cache(abc.ABC):
+    """Interface shared by the cache backends a manager can be given."""
+
+    ttl: float
+    maxsize: int
+
+    @abc.abstractmethod
+    def get(self, key: typing.Hashable, default=None):
+        pass
+
+    @abc.abstractmethod
+    def set(
+        self,
+        key: typing.Hashable,
+        value: typing.Any,
+        ttl: typing.Optional[float] = None,
+    ):
+        """Store value for ``ttl`` seconds, or the cache's ttl when not given."""
+
+    @abc.abstractmethod
+    def clear(self):
+        pass
+
+    @abc.abstractmethod
+    def stats(self) -> typing.Dict[str, int]:
+        pass
+
+    @abc.abstractmethod
+    def __len__(self):
+        pass
+
+
+class TTLCache(Cache):
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl: float = 30, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[typing.Hashable, typing.Tuple[float, typing.Any]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: typing.Hashable, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(
+        self,
+        key: typing.Hashable,
+        value: typing.Any,
+        ttl: typing.Optional[float] = None,
+    ):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> typing.Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+def _dumps(value: typing.Any) -> bytes:
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) < COMPRESS_MIN_BYTES:
+        return b"p" + data
+    return b"z" + zlib.compress(data, 1)
+
+
+def _loads(data: bytes) -> typing.Any:
+    if data[:1] == b"z":
+        return pickle.loads(zlib.decompress(data[1:]))
+    return pickle.loads(data[1:])
+
+
+class SQLiteCache(Cache):
+    """Cache kept in a SQLite database in WAL mode, shared by every process on a
+    host that opens the same file (e.g. gunicorn workers), so they share one warm
+    cache and a restarted worker doesn't start cold.
+
+    Several caches can share a file under different ``namespace``s. Values are
+    pickled, and zlib compressed when large, so the file must only be writable
+    by the app. Expiry uses wall clock time since it is compared across
+    processes. Every EVICT_EVERY sets, expired entries are deleted and the ones
+    closest to expiry go until at most ``maxsize`` are left, so reads never
+    write. Hit and miss counts are per process.
+    """
+
+    def __init__(
+        self,
+        path: typing.Union[str, os.PathLike],
+        namespace: str,
+        ttl: float = 30,
+        maxsize: int = 1024,
+        timeout: float = 5.0,
+    ):
+        self.path = os.fspath(path)
+        self.namespace = namespace
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._sets = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " value BLOB NOT NULL,"
+                " PRIMARY KEY (namespace, key)"
+                ") WITHOUT ROWID"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_expiry"
+                " ON cache (namespace, expires_at)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # one connection per thread, and never one inherited from a parent process
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _key(key: typing.Hashable) -> str:
+        # stable across processes for the str, number, date and tuple keys used
+        return repr(key)
+
+    def get(self, key: typing.Hashable, default=None):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT value FROM cache"
+                " WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, self._key(key), time.time()),
+            )
+            .fetchone()
+        )
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return default if row is None else _loads(row[0])
+
+    def set(
+        self,
+        key: typing.Hashable,
+        value: typing.Any,
+        ttl: typing.Optional[float] = None,
+    ):
+        ttl = self.ttl if ttl is None else ttl
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, expires_at, value)"
+                " VALUES (?, ?, ?, ?)",
+                (self.namespace, self._key(key), time.time() + ttl, _dumps(value)),
+            )
+        with self._lock:
+            self._sets += 1
+            evict = self._sets % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?",
+                (self.namespace, time.time()),
+            )
+            connection.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                " SELECT key FROM cache WHERE namespace = ?"
+                " ORDER BY expires_at DESC LIMIT -1 OFFSET ?"
+                ")",
+                (self.namespace, self.namespace, self.maxsize),
+            )
+
+    def clear(self):
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM cache WHERE namespace = ?", (self.namespace,)
+            )
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> typing.Dict[str, int]:
+        size = len(self)
+        with self._lock:
+            return {"size": size, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        (size,) = (
+            self._connection()
+            .execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ? AND expires_at > ?",
+                (self.namespace, time.time()),
+            )
+            .fetchone()
+        )
+        return size
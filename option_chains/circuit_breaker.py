@@ -0,0 +1,150 @@
+import asyncio
+import contextlib
+import logging
+import threading
+import time
+import typing
+
+log = logging.getLogger(__name__)
+DEFAULT_FAILURE_THRESHOLD = 5  # consecutive failures
+DEFAULT_RESET_TIMEOUT = 30  # seconds
+# E*Trade answers a request for an unknown symbol with one of these, and an
+# error message that mentions the symbol
+BAD_SYMBOL_STATUSES = (400, 404)
+
+
+def _http_error(ex: BaseException) -> typing.Tuple[typing.Optional[int], str]:
+    """Status and body of an error response from either ``requests`` or
+    ``aiohttp``, or (None, "") for an error without a response."""
+    status = getattr(ex, "status", None)  # aiohttp.ClientResponseError
+    if status is not None:
+        return status, str(getattr(ex, "message", ""))
+    response = getattr(ex, "response", None)  # requests.exceptions.HTTPError
+    if response is not None:
+        return getattr(response, "status_code", None), getattr(response, "text", "")
+    return None, ""
+
+
+def is_bad_symbol_error(ex: BaseException) -> bool:
+    """True for E*Trade's 400/404 "invalid symbol" responses, the only http
+    errors that say something about the ticker rather than the api or the
+    session (e.g. a 401 for an expired token)."""
+    status, body = _http_error(ex)
+    return status in BAD_SYMBOL_STATUSES and "symbol" in (body or "").lower()
+
+
+def is_endpoint_failure(ex: BaseException) -> bool:
+    """True for errors that say the endpoint can't be used right now: 429/5xx,
+    auth errors (401/403), any other http error that isn't a bad symbol,
+    connection errors and timeouts. False for errors about a particular request,
+    e.g. a 400 for an unknown symbol."""
+    status, _ = _http_error(ex)
+    if status is not None:
+        return not is_bad_symbol_error(ex)
+    # requests' ConnectionError and Timeout are OSErrors too
+    return isinstance(ex, (OSError, asyncio.TimeoutError))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker.
+
+    After ``failure_threshold`` consecutive endpoint failures the endpoint's
+    circuit opens and calls to it fail fast with CircuitOpenError, so a scan
+    doesn't spend its time waiting on retries against an api that is down.
+    Once ``reset_timeout`` seconds have passed a single trial call is let
+    through; if it succeeds the circuit closes, otherwise it opens again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.rejected = 0
+
+        self._failures: typing.Dict[str, int] = {}
+        self._opened_at: typing.Dict[str, float] = {}
+        self._trials: typing.Set[str] = set()  # half open, trial call in flight
+        self._lock = threading.Lock()
+
+    def state(self, endpoint: str) -> str:
+        with self._lock:
+            opened_at = self._opened_at.get(endpoint)
+            if opened_at is None:
+                return "closed"
+            if endpoint in self._trials or (
+                time.monotonic() - opened_at >= self.reset_timeout
+            ):
+                return "half_open"
+            return "open"
+
+    def before_call(self, endpoint: str):
+        with self._lock:
+            opened_at = self._opened_at.get(endpoint)
+            if opened_at is None:
+                return
+            if (
+                endpoint in self._trials
+                or time.monotonic() - opened_at < self.reset_timeout
+            ):
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit for '{endpoint}' is open")
+            self._trials.add(endpoint)
+
+    def record(self, endpoint: str, failed: typing.Optional[bool]):
+        """Record a call's outcome; None (e.g. a cancelled call, or a client
+        error like an unknown symbol) says nothing about the endpoint and only
+        ends a trial call."""
+        with self._lock:
+            self._trials.discard(endpoint)
+            if failed is None:
+                return
+            if not failed:
+                self._failures[endpoint] = 0
+                if self._opened_at.pop(endpoint, None) is not None:
+                    log.info(f"Circuit for '{endpoint}' closed.")
+                return
+
+            self._failures[endpoint] = self._failures.get(endpoint, 0) + 1
+            if (
+                endpoint in self._opened_at
+                or self._failures[endpoint] >= self.failure_threshold
+            ):
+                if endpoint not in self._opened_at:
+                    log.warning(
+                        f"Circuit for '{endpoint}' opened after "
+                        f"{self._failures[endpoint]} consecutive failures."
+                    )
+                self._opened_at[endpoint] = time.monotonic()
+
+    @contextlib.contextmanager
+    def guard(self, endpoint: str):
+        """Fail fast if the endpoint's circuit is open, otherwise record whether
+        the call made in this context failed. Also usable around an ``await``."""
+        self.before_call(endpoint)
+        failed = None
+        try:
+            yield
+            failed = False
+        except Exception as ex:
+            # a client error says nothing about whether the endpoint is up
+            failed = True if is_endpoint_failure(ex) else None
+            raise
+        finally:
+            self.record(endpoint, failed)
+
+    def states(self) -> typing.Dict[str, str]:
+        """State of every endpoint whose circuit isn't closed."""
+        with self._lock:
+            endpoints = list(self._opened_at)
+        return {endpoint: self.state(endpoint) for endpoint in endpoints}
+
+
+# shared by every manager so that all scans in a process see a failing endpoint
+CIRCUIT_BREAKER = CircuitBreaker()
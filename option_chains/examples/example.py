@@ -29,7 +29,7 @@ def main():
         oauth_secret="wURP9wwdYMlLeauOvzrI/OpaHgKNE/r7W38rRoDNop4=",
     )
 
-    print(manager.get_market_price("GOOG"))
+    print(manager.get_market_data("GOOG").market_price)
 
     pprint.pprint(
         manager.get_options_info(
@@ -38,8 +38,8 @@ def main():
             max_strike=0.1,  # all arguments below have defaults and don't need to be passed
             increment=100,
             month_look_ahead=3,
-            hide_no_contracts=True,
-            hide_no_interest=True,
+            min_volume=1,
+            min_open_interest=1,
             contracts_to_buy=1,  # defaults to max available
         )
     )
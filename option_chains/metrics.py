@@ -0,0 +1,231 @@
+import bisect
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+import typing
+from collections import defaultdict
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelValues = typing.Tuple[typing.Tuple[str, str], ...]
+
+
+def _format_labels(labels: LabelValues, **extra: str) -> str:
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: typing.Dict[LabelValues, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] += amount
+
+    def get(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> typing.List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(
+                    f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+                )
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # per label set: (count per bucket, not cumulative, plus overflow; sum)
+        self._values: typing.Dict[LabelValues, typing.Tuple] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self) -> typing.List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip([*self.buckets, "+Inf"], counts):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _format_value(bound)
+                    lines.append(
+                        f"{self.name}_bucket{_format_labels(labels, le=le)} {cumulative}"
+                    )
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {total!r}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Callback:
+    """Metric whose values are read from a callback when metrics are rendered,
+    for state that is already counted elsewhere (e.g. cache hits)."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        collect: typing.Callable[[], typing.Dict[LabelValues, float]],
+        type: str = "gauge",
+    ):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.type = type
+
+    def render(self) -> typing.List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram("option_chains_stage_seconds", "Time spent in each scan stage.")
+)
+API_CALLS = REGISTRY.register(
+    Counter("option_chains_api_calls_total", "Market API requests by endpoint.")
+)
+RETRIES = REGISTRY.register(
+    Counter("option_chains_retries_total", "Retried calls by function.")
+)
+SKIPPED_TICKERS = REGISTRY.register(
+    Counter(
+        "option_chains_skipped_total",
+        "Tickers or chains left out of a scan, by stage and reason.",
+    )
+)
+
+
+class Timings:
+    """Stage durations recorded while handling one request, tagged by ticker."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: typing.List[typing.Tuple[str, typing.Optional[str], float]] = []
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, ticker: typing.Optional[str], seconds: float):
+        with self._lock:
+            self.spans.append((stage, ticker, seconds))
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> typing.List[typing.Dict]:
+        """Per stage: span count, total and slowest span (with its ticker), in
+        order of first appearance. Spans run concurrently, so totals can add up
+        to more than the wall time."""
+        stages = {}
+        with self._lock:
+            spans = list(self.spans)
+        for stage, ticker, seconds in spans:
+            summary = stages.setdefault(
+                stage, {"stage": stage, "count": 0, "seconds": 0.0, "max": 0.0}
+            )
+            summary["count"] += 1
+            summary["seconds"] += seconds
+            if seconds >= summary["max"]:
+                summary["max"], summary["max_ticker"] = seconds, ticker
+        return list(stages.values())
+
+
+_timings: contextvars.ContextVar[typing.Optional[Timings]] = contextvars.ContextVar(
+    "timings", default=None
+)
+
+
+@contextlib.contextmanager
+def collect_timings() -> typing.Iterator[Timings]:
+    """Record the spans of everything run in this context (and in functions
+    wrapped with bind_timings) into a new Timings."""
+    timings = Timings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def bind_timings(fn: typing.Callable) -> typing.Callable:
+    """Make fn record into the caller's Timings when it runs on another thread."""
+    timings = _timings.get()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _timings.set(timings)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _timings.reset(token)
+
+    return wrapper
+
+
+def observe(stage: str, seconds: float, ticker: typing.Optional[str] = None):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(stage, ticker, seconds)
+
+
+@contextlib.contextmanager
+def span(stage: str, ticker: typing.Optional[str] = None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start, ticker)
+
+
+def count_retry(retry_state):
+    """tenacity ``before_sleep`` hook counting each retry of the wrapped function."""
+    RETRIES.inc(function=retry_state.fn.__name__)
@@ -1,22 +1,46 @@
+import contextvars
 import datetime
+import functools
+import itertools
 import logging
-import pathlib
+import queue
+import threading
+import time
 import typing
-import xml.parsers.expat
+import weakref
 from dataclasses import dataclass
 from multiprocessing.dummy import Pool as ThreadPool
 
+import numpy as np
 import pandas as pd
 import pyetrade
 import pytz
+import requests.adapters
 import requests.exceptions
 from tenacity import (
     retry,
     stop_after_attempt,
     wait_exponential,
-    retry_if_exception_type,
+    retry_if_exception,
 )
 
+from option_chains import metrics, pricing
+from option_chains.cache import Cache, TTLCache
+from option_chains.circuit_breaker import (
+    CIRCUIT_BREAKER,
+    CircuitBreaker,
+    CircuitOpenError,
+    is_endpoint_failure,
+)
+from option_chains.puts import Puts
+from option_chains.rate_limiter import RATE_LIMITER, RateLimiter, is_throttle_error
+from option_chains.sectors import get_sector_index
+from option_chains.single_flight import SingleFlight
+from option_chains.top_k import TopK
+
+if typing.TYPE_CHECKING:
+    from option_chains.snapshot_store import SnapshotStore
+
 log = logging.getLogger(__name__)
 VALID_INCREMENTS = [1, 2.5, 5, 10, 50, 100]
 PUT_INFO_TO_INCLUDE = [
@@ -31,6 +55,365 @@ PUT_INFO_TO_INCLUDE = [
     "optionType",
     "netChange",
 ]
+# the types PUT_INFO_TO_INCLUDE are parsed to, once, when a chain is read
+PUT_INFO_TYPES = {
+    "bid": np.float64,
+    "ask": np.float64,
+    "lastPrice": np.float64,
+    "volume": np.int64,
+    "openInterest": np.int64,
+    "OptionGreeks": object,
+    "strikePrice": np.float64,
+    "symbol": object,
+    "optionType": object,
+    "netChange": np.float64,
+}
+AUXILIARY_INFO = [
+    "contractsToBuy",
+    "revenue",
+    "annualizedRevenue",
+    "annualizedReturn",
+    "notionalPrinciple",
+]
+# added by reprice_puts
+WHAT_IF_INFO = [
+    "modelIv",
+    "delta",
+    "theta",
+    "whatIfRevenue",
+    "whatIfAnnualizedReturn",
+]
+DISPLAY_COLUMNS = [
+    "Ticker",
+    "Company",
+    "52%",
+    "Price",
+    "Exp",
+    "Stk",
+    "BM",
+    "A%",
+    "$",
+    "NP",
+    "B",
+    "A",
+    "L",
+    "C",
+    "V",
+    "OI",
+    "52Lo",
+    "52Hi",
+    "NED",
+    "Sector",
+    "Sub-Sector",
+]
+DISPLAY_LABELS = {
+    "symbol": "Ticker",
+    "strikePrice": "Stk",
+    "bid": "B",
+    "ask": "A",
+    "volume": "V",
+    "openInterest": "OI",
+    "netChange": "C",
+    "lastPrice": "L",
+    "expiryDate": "Exp",
+    "marketPrice": "Price",
+    "annualizedReturn": "A%",
+    "belowMarketPct": "BM",
+    "revenue": "$",
+    "notionalPrinciple": "NP",
+    "modelIv": "IV",
+    "delta": "Δ",
+    "theta": "Θ",
+    "whatIfRevenue": "WI $",
+    "whatIfAnnualizedReturn": "WI A%",
+}
+HIDDEN_COLUMNS = ["optionType", "contractsToBuy", "annualizedRevenue"]
+# what a top-K scan can rank puts by, best (highest) first
+RANK_COLUMNS = ["annualizedReturn", "belowMarketPct"]
+MAX_QUOTE_SYMBOLS = 25  # E*Trade quote endpoint limit per call
+QUOTE_CACHE_TTL = 30  # seconds
+CHAIN_CACHE_TTL = 60  # seconds
+EXPIRY_CACHE_TTL = 24 * 3600  # seconds, unless cached until the next trading day
+FAILED_TICKER_TTL = 3600  # seconds a failing ticker is left out of scans
+DEFAULT_THREAD_COUNT = 6
+MARKET_TIMEZONE = pytz.timezone("US/Eastern")
+# with a time budget, no new requests are started in the last second of it
+DEADLINE_MARGIN = 1.0  # seconds
+BUDGET_ROUND_SIZE = 4  # tickers per thread in each round of a budgeted scan
+
+# shared by every manager so that a quote is only fetched once per ticker per TTL
+QUOTE_CACHE = TTLCache(ttl=QUOTE_CACHE_TTL, maxsize=2048)
+
+# raw api responses, so that changing only the volume / open interest / return
+# thresholds re-filters in memory instead of downloading the chains again
+CHAIN_CACHE = TTLCache(ttl=CHAIN_CACHE_TTL, maxsize=8192)
+EXPIRY_CACHE = TTLCache(ttl=EXPIRY_CACHE_TTL, maxsize=2048)
+
+# negative cache of tickers that failed in a way specific to them (unknown
+# symbol, bad expiry dates, no chain data), mapped to the reason
+FAILED_TICKERS = TTLCache(ttl=FAILED_TICKER_TTL, maxsize=4096)
+
+# shared by every manager so identical scans from different users run only once
+SCAN_FLIGHTS = SingleFlight()
+
+# the RequestBudget charged for requests made in this context, see _iter_scan_frames
+_REQUEST_BUDGET: contextvars.ContextVar[typing.Optional["RequestBudget"]] = (
+    contextvars.ContextVar("request_budget", default=None)
+)
+
+# live managers, whose caches (e.g. the app's SQLite caches) are read for metrics
+MANAGERS = weakref.WeakSet()
+MANAGERS_LOCK = threading.Lock()
+
+
+def _format_ned(ned: str) -> str:
+    try:
+        return datetime.datetime.strptime(ned, "%m/%d/%Y").strftime("%m/%d/%y")
+    except Exception:
+        return ned
+
+
+# display strings for the typed columns of a labelled scan frame, also usable
+# as DataFrame.to_html(formatters=...) to only format the values when rendering
+DISPLAY_FORMATTERS = {
+    "Exp": lambda dt: dt.strftime("%m/%d/%y"),
+    "NED": _format_ned,
+    "52%": "{:.0%}".format,
+    "BM": "{:.1%} BM".format,
+    "A%": "{:.2%} AR".format,
+    "$": "${}".format,
+    "NP": "${:,}".format,
+    "IV": "{:.0%}".format,
+    "Δ": "{:.2f}".format,
+    "Θ": "{:.3f}".format,
+    "WI $": "${}".format,
+    "WI A%": "{:.2%} AR".format,
+}
+
+
+def _format_distinct(series: pd.Series, formatter: typing.Callable) -> pd.Series:
+    """Apply formatter once per distinct value of series instead of once per row."""
+    codes, uniques = pd.factorize(series)
+    formatted = [formatter(value) for value in uniques]
+    missing = codes == -1
+    if missing.any():
+        # factorize codes missing values as -1, which picks the last entry
+        formatted.append(formatter(series[missing].iloc[0]))
+    return pd.Series(
+        np.array(formatted, dtype=object)[codes], index=series.index, name=series.name
+    )
+
+
+def _expiry_calendar_ttl(now: typing.Optional[datetime.datetime] = None) -> float:
+    """Seconds until the next trading day starts, when expiry calendars can next
+    change. Weekends are skipped, exchange holidays aren't."""
+    now = (now or datetime.datetime.now(tz=pytz.utc)).astimezone(MARKET_TIMEZONE)
+    day = now.date() + datetime.timedelta(days=1)
+    while day.weekday() >= 5:
+        day += datetime.timedelta(days=1)
+    start = MARKET_TIMEZONE.localize(datetime.datetime.combine(day, datetime.time()))
+    return (start - now).total_seconds()
+
+
+def _today() -> pd.Timestamp:
+    tz = pytz.timezone("EST")
+    return pd.Timestamp(tz.localize(datetime.datetime.now()).date())
+
+
+def _days_to_expiry(expiry_dates: typing.Iterable) -> np.ndarray:
+    # there are only a few distinct expiries, so each is converted once
+    expiry_dates = list(expiry_dates)
+    today = _today()
+    days = {date: (pd.Timestamp(date) - today).days for date in set(expiry_dates)}
+    return np.array([days[date] for date in expiry_dates], dtype=np.int64)
+
+
+def _round(values: np.ndarray, digits: int) -> np.ndarray:
+    """Round each value with the builtin round, as the per put dicts were.
+
+    NumPy's round scales by 10 ** digits first, so it can round a value like
+    0.21535 the other way.
+    """
+    return np.array([round(value, digits) for value in values.tolist()], dtype=float)
+
+
+def _put_metrics(
+    market_price: np.ndarray,
+    strike_price: np.ndarray,
+    bid: np.ndarray,
+    ask: np.ndarray,
+    volume: np.ndarray,
+    days_to_hold: typing.Union[int, np.ndarray],
+    contracts_to_buy: int,
+) -> typing.Dict[str, np.ndarray]:
+    """The fields process_puts adds, for arrays of puts."""
+    contracts = np.minimum(contracts_to_buy, volume)
+    contract_price = (bid + ask) / 2
+    num_underlying_shares = 100 * contracts
+    revenue = contract_price * num_underlying_shares
+
+    days_to_hold = np.broadcast_to(days_to_hold, revenue.shape)
+    annualize_factor = np.divide(
+        365, days_to_hold, out=np.zeros(revenue.shape), where=days_to_hold > 0
+    )
+    return {
+        "belowMarketPct": _round((market_price - strike_price) / market_price, 3),
+        "contractsToBuy": contracts,
+        "revenue": _round(revenue, 2),
+        "annualizedRevenue": (revenue * annualize_factor).astype(int),
+        # (revenue / (strike * 100)) * annualize factor (expressed as decimal)
+        "annualizedReturn": _round(
+            (revenue / (strike_price * 100)) * annualize_factor, 4
+        ),
+        "notionalPrinciple": (strike_price * 100 * contracts).round().astype(int),
+    }
+
+
+class RequestBudget:
+    """Api requests a scan may make, and how many it has made so far.
+
+    A scan given one stops starting new lookups once it's spent, so it can go
+    over by at most the requests already in flight. Only that scan's requests
+    are charged, not others made on the same rate limiter meanwhile.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def charge(self):
+        with self._lock:
+            self.spent += 1
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.spent)
+
+
+def _bind_request_budget(
+    fn: typing.Callable, budget: typing.Optional[RequestBudget]
+) -> typing.Callable:
+    """Make the requests fn makes, on whichever thread it runs, charge budget."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _REQUEST_BUDGET.set(budget)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _REQUEST_BUDGET.reset(token)
+
+    return wrapper
+
+
+def _is_ticker_failure(ex: BaseException) -> bool:
+    """True for errors caused by the ticker itself (an invalid symbol or bad
+    data) rather than by the api or the session, e.g. an expired token."""
+    return not isinstance(ex, CircuitOpenError) and not is_endpoint_failure(ex)
+
+
+def _is_retryable(ex: BaseException) -> bool:
+    # a bad request (e.g. an unknown symbol) fails the same way every attempt
+    return isinstance(ex, requests.exceptions.HTTPError) and is_throttle_error(ex)
+
+
+def _cache_stats(stat: str) -> typing.Dict:
+    """The stat of each kind of cache, summed over the distinct caches that the
+    module level defaults and the live managers use."""
+    with MANAGERS_LOCK:
+        managers = list(MANAGERS)
+    caches = {
+        "quote": [QUOTE_CACHE, *(manager.quote_cache for manager in managers)],
+        "chain": [CHAIN_CACHE, *(manager.chain_cache for manager in managers)],
+        "expiry": [EXPIRY_CACHE, *(manager.expiry_cache for manager in managers)],
+        "failed_ticker": [
+            FAILED_TICKERS,
+            *(manager.failed_tickers for manager in managers),
+        ],
+    }
+    return {
+        (("cache", name),): sum(
+            cache.stats()[stat]
+            for cache in {id(cache): cache for cache in kind}.values()
+        )
+        for name, kind in caches.items()
+    }
+
+
+def _register_metrics():
+    """Expose what the shared caches, limiter and single flight already count."""
+    register = metrics.REGISTRY.register
+    for stat, kind in [("hits", "counter"), ("misses", "counter"), ("size", "gauge")]:
+        register(
+            metrics.Callback(
+                f"option_chains_cache_{stat}" + ("_total" if kind == "counter" else ""),
+                f"Cache {stat}, summed over the caches in use.",
+                lambda stat=stat: _cache_stats(stat),
+                type=kind,
+            )
+        )
+    register(
+        metrics.Callback(
+            "option_chains_rate_limit",
+            "Requests per second allowed by the shared limiter.",
+            lambda: {(): RATE_LIMITER.rate},
+        )
+    )
+    register(
+        metrics.Callback(
+            "option_chains_concurrency_limit",
+            "Concurrent requests allowed by the shared limiter.",
+            lambda: {(): RATE_LIMITER.concurrency},
+        )
+    )
+    register(
+        metrics.Callback(
+            "option_chains_rate_limiter_in_flight",
+            "Requests holding a slot of the shared limiter.",
+            lambda: {(): RATE_LIMITER.metrics()["in_flight"]},
+        )
+    )
+    register(
+        metrics.Callback(
+            "option_chains_throttled_total",
+            "Throttled (429/5xx) responses.",
+            lambda: {(): RATE_LIMITER.throttle_events},
+            type="counter",
+        )
+    )
+    register(
+        metrics.Callback(
+            "option_chains_circuit_open",
+            "Endpoints whose circuit is open (1) or half open (0.5).",
+            lambda: {
+                (("endpoint", endpoint),): 1 if state == "open" else 0.5
+                for endpoint, state in CIRCUIT_BREAKER.states().items()
+            },
+        )
+    )
+    register(
+        metrics.Callback(
+            "option_chains_circuit_rejected_total",
+            "Requests failed fast by an open circuit.",
+            lambda: {(): CIRCUIT_BREAKER.rejected},
+            type="counter",
+        )
+    )
+    register(
+        metrics.Callback(
+            "option_chains_scans_total",
+            "Scans executed, and identical scans that joined one in flight.",
+            lambda: {
+                (("result", "executed"),): SCAN_FLIGHTS.executions,
+                (("result", "coalesced"),): SCAN_FLIGHTS.coalesced,
+            },
+            type="counter",
+        )
+    )
+
+
+_register_metrics()
 
 
 @dataclass
@@ -45,14 +428,717 @@ class MarketData:
     next_earnings_date: str
 
 
-class OptionsManager:
+class BaseOptionsManager:
+    """Scan steps that don't touch the network, shared by the sync and async managers."""
+
+    def __init__(
+        self,
+        quote_cache: typing.Optional[Cache] = None,
+        rate_limiter: typing.Optional[RateLimiter] = None,
+        chain_cache: typing.Optional[Cache] = None,
+        expiry_cache: typing.Optional[Cache] = None,
+        snapshot_store: typing.Optional["SnapshotStore"] = None,
+        failed_tickers: typing.Optional[Cache] = None,
+        circuit_breaker: typing.Optional[CircuitBreaker] = None,
+    ):
+        self.quote_cache = QUOTE_CACHE if quote_cache is None else quote_cache
+        self.rate_limiter = RATE_LIMITER if rate_limiter is None else rate_limiter
+        self.chain_cache = CHAIN_CACHE if chain_cache is None else chain_cache
+        self.expiry_cache = EXPIRY_CACHE if expiry_cache is None else expiry_cache
+        # scanned puts are only kept when a store is given
+        self.snapshot_store = snapshot_store
+        self.failed_tickers = (
+            FAILED_TICKERS if failed_tickers is None else failed_tickers
+        )
+        self.circuit_breaker = (
+            CIRCUIT_BREAKER if circuit_breaker is None else circuit_breaker
+        )
+        with MANAGERS_LOCK:
+            MANAGERS.add(self)
+
+    def _get_scan_tickers(
+        self,
+        sector: typing.Optional[str],
+        sub_sector: typing.Optional[str],
+        blue_chip_only: bool,
+    ) -> typing.List[str]:
+        tickers = get_sector_index().get_tickers(sector, sub_sector, blue_chip_only)
+
+        # skip tickers that failed recently until their cooldown is over
+        failed = {}
+        for ticker in tickers:
+            reason = self.failed_tickers.get(ticker)
+            if reason is not None:
+                failed[ticker] = reason
+        if failed:
+            log.info(f"Skipping {len(failed)} recently failed tickers: {failed}")
+            metrics.SKIPPED_TICKERS.inc(len(failed), stage="scan", reason="cooldown")
+        return [ticker for ticker in tickers if ticker not in failed]
+
+    def _skip_ticker(self, ticker: str, stage: str, reason: str, cooldown: bool = True):
+        """Count a ticker left out of a scan and, with ``cooldown``, leave it out
+        of scans until FAILED_TICKER_TTL has passed."""
+        metrics.SKIPPED_TICKERS.inc(stage=stage, reason=reason)
+        if cooldown:
+            self.failed_tickers.set(ticker, f"{stage}: {reason}")
+
+    def _skip_ticker_on_error(self, ticker: str, stage: str, ex: Exception):
+        # an api that is failing says nothing about the ticker itself
+        self._skip_ticker(
+            ticker, stage, type(ex).__name__, cooldown=_is_ticker_failure(ex)
+        )
+
+    def _skip_quote_chunk(self, tickers: typing.List[str], ex: Exception):
+        log.error(f"Failed to fetch quotes for {len(tickers)} tickers: {ex}")
+        # a failed request doesn't say which of its tickers is at fault
+        for ticker in tickers:
+            self._skip_ticker(ticker, "quote", type(ex).__name__, cooldown=False)
+
+    def _screen_tickers(
+        self,
+        tickers: typing.List[str],
+        all_market_data: typing.Dict[str, MarketData],
+        percentile_of_52_range: int,
+    ) -> typing.List[str]:
+        for ticker in tickers:
+            if ticker not in all_market_data:
+                log.error(f"Skipping ticker '{ticker}' due to missing quote data")
+                self._skip_ticker(ticker, "quote", "missing_quote")
+        tickers = [
+            ticker
+            for ticker in tickers
+            if ticker in all_market_data
+            and all_market_data[ticker].percentile_52 * 100 <= percentile_of_52_range
+        ]
+        log.info(f"Searching {len(tickers)} tickers within 52 week percentile range.")
+        return tickers
+
+    def _prioritize_tickers(
+        self,
+        tickers: typing.List[str],
+        all_market_data: typing.Dict[str, MarketData],
+    ) -> typing.List[str]:
+        """Order tickers by a pre-score that only needs their quotes: blue chips
+        first, then the ones lowest in their 52 week range."""
+        blue_chips = get_sector_index().blue_chips
+        return sorted(
+            tickers,
+            key=lambda ticker: (
+                ticker not in blue_chips,
+                all_market_data[ticker].percentile_52,
+            ),
+        )
+
+    def _collect_puts(
+        self,
+        expiry_dates: typing.Dict[str, typing.List[datetime.date]],
+        chains: typing.Iterable[
+            typing.Tuple[str, datetime.date, typing.Optional[Puts]]
+        ],
+    ) -> typing.Dict[str, Puts]:
+        puts_by_ticker = {ticker: {} for ticker, dates in expiry_dates.items() if dates}
+        for ticker, expiry_date, puts in chains:
+            puts_by_ticker[ticker][expiry_date] = puts
+
+        result = {}
+        for ticker, puts_by_date in puts_by_ticker.items():
+            chunks = []
+            # keep expiry order and stop at the first date without chain data
+            for expiry_date in expiry_dates[ticker]:
+                if puts_by_date.get(expiry_date) is None:
+                    break
+                chunks.append(puts_by_date[expiry_date])
+            result[ticker] = self._concat_puts(chunks)
+        return result
+
+    def _concat_puts(self, chunks: typing.List[Puts]) -> Puts:
+        if not chunks:
+            return self._empty_puts()
+        return Puts.concat(chunks)
+
+    def _empty_puts(self) -> Puts:
+        return self._chain_puts([], None, np.nan)
+
+    def _get_scan_frame(
+        self,
+        puts_by_ticker: typing.Dict[str, Puts],
+        all_market_data: typing.Dict[str, MarketData],
+        min_volume: int = 1,
+        min_open_interest: int = 1,
+        min_annualized_return: float = 0.0,
+    ) -> pd.DataFrame:
+        # process and filter every ticker's puts in one pass, and only build a
+        # frame from the ones left
+        tickers = list(puts_by_ticker)
+        puts = self._concat_puts(list(puts_by_ticker.values()))
+        puts = puts.assign(
+            scanTicker=np.repeat(
+                np.array(tickers, dtype=object),
+                [len(chunk) for chunk in puts_by_ticker.values()],
+            )
+        )
+
+        with metrics.span("filter_puts"):
+            puts = self.filter_puts(
+                f"{len(tickers)} tickers",
+                puts,
+                min_volume=min_volume,
+                min_open_interest=min_open_interest,
+                min_annualized_return=min_annualized_return,
+            )
+        df = puts.drop("OptionGreeks", "iv", "scanTicker").to_frame()
+        return self._add_market_columns(
+            df,
+            pd.Series(puts["scanTicker"], index=df.index, dtype=object),
+            [all_market_data[ticker] for ticker in tickers],
+        )
+
+    def _add_market_columns(
+        self,
+        df: pd.DataFrame,
+        puts_ticker: pd.Series,
+        market_data: typing.List[MarketData],
+    ) -> pd.DataFrame:
+        df["Company"] = puts_ticker.map(
+            {md.ticker: md.company_name[0:15] for md in market_data}
+        )
+        df["52%"] = puts_ticker.map({md.ticker: md.percentile_52 for md in market_data})
+        df["52Lo"] = puts_ticker.map({md.ticker: md.low_52 for md in market_data})
+        df["52Hi"] = puts_ticker.map({md.ticker: md.high_52 for md in market_data})
+        df["NED"] = puts_ticker.map(
+            {md.ticker: md.next_earnings_date for md in market_data}
+        )
+        return df
+
+    def _rank_puts(
+        self,
+        ticker: str,
+        expiry_date: datetime.date,
+        response: typing.Dict,
+        market_price: float,
+        valid_strikes: typing.Set[int],
+        top_k: int,
+        rank_by: str = "annualizedReturn",
+        min_volume: int = 1,
+        min_open_interest: int = 1,
+        min_annualized_return: float = 0.0,
+        snapshot: bool = False,
+    ) -> typing.Optional[Puts]:
+        """Process and filter a chain like filter_puts, but return only its best
+        top_k puts by rank_by, best first, for _push_top_puts. None when the
+        response has no chain data. With ``snapshot`` (a freshly fetched chain),
+        every put is also queued for the snapshot store."""
+        puts = self._parse_puts(
+            ticker, expiry_date, response, market_price, valid_strikes
+        )
+        if puts is None:
+            return None
+        puts = self.process_puts(puts, 1)
+        if snapshot:
+            self._append_snapshot(ticker, puts)
+
+        score = puts[rank_by]
+        strike_price = puts["strikePrice"]
+        valid = (
+            (puts["volume"] >= min_volume)
+            & (puts["openInterest"] >= min_open_interest)
+            & (puts["annualizedReturn"] >= min_annualized_return / 100)
+            & ~np.isnan(score)
+        )
+
+        # best first, ties broken by the higher strike like the TopK key
+        index = np.flatnonzero(valid)
+        index = index[np.lexsort((strike_price[index], score[index]))][::-1][:top_k]
+        return puts.take(index).drop("OptionGreeks", "iv")
+
+    def _push_top_puts(
+        self,
+        top: TopK,
+        ticker: str,
+        expiry_dates: typing.List[datetime.date],
+        chains: typing.Iterable[
+            typing.Tuple[str, datetime.date, typing.Optional[Puts]]
+        ],
+        rank_by: str = "annualizedReturn",
+    ):
+        ranked_by_date = {expiry_date: ranked for _, expiry_date, ranked in chains}
+        # keep expiry order and stop at the first date without chain data
+        for expiry_date in expiry_dates:
+            ranked = ranked_by_date.get(expiry_date)
+            if ranked is None:
+                break
+            if not len(ranked):
+                continue
+            score, strike_price = ranked[rank_by], ranked["strikePrice"]
+            for i in range(len(ranked)):
+                # a kept put is copied out of its chain, so the heap holds k rows
+                # rather than every chain that has a put in the top k
+                top.push_with(
+                    (score[i], ticker, expiry_date, strike_price[i]),
+                    lambda i=i: (ticker, ranked.take(np.array([i]))),
+                )
+
+    def _get_top_frame(
+        self, top: TopK, all_market_data: typing.Dict[str, MarketData]
+    ) -> pd.DataFrame:
+        """The puts kept by top, best first, with the columns of _get_scan_frame."""
+        entries = top.items()
+        if not entries:
+            return pd.DataFrame()
+
+        df = Puts.concat([put for _, put in entries]).to_frame()
+        puts_ticker = pd.Series(
+            [ticker for ticker, _ in entries], index=df.index, dtype=object
+        )
+        return self._add_market_columns(
+            df,
+            puts_ticker,
+            [all_market_data[ticker] for ticker in dict.fromkeys(puts_ticker)],
+        )
+
+    def _format_options_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = self._label_options_frame(df)
+        if df.empty:
+            return df
+        return self.format_display_values(df)
+
+    def _label_options_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Rename, drop and reorder scan columns for display, keeping their types.
+
+        The labelled frame is built in one go rather than renamed and dropped in
+        place and then copied again to reorder, and df is left untouched.
+        """
+        if df.empty:
+            labelled = pd.DataFrame()
+            labelled.attrs.update(df.attrs)
+            return labelled
+
+        columns = {
+            DISPLAY_LABELS.get(col, col): df[col]
+            for col in df.columns
+            if col not in HIDDEN_COLUMNS
+        }
+
+        # add sector and sub-sector columns to final df
+        sector_index = get_sector_index()
+        columns["Sector"] = df["symbol"].map(sector_index.ticker_to_sector)
+        columns["Sub-Sector"] = df["symbol"].map(sector_index.ticker_to_sub_sector)
+
+        final_cols = [
+            *DISPLAY_COLUMNS,
+            *[col for col in columns if col not in DISPLAY_COLUMNS],
+        ]
+        labelled = pd.DataFrame({col: columns[col] for col in final_cols})
+        labelled.attrs.update(df.attrs)
+        return labelled
+
+    @metrics.span("format_display_values")
+    def format_display_values(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Turn the typed columns of a labelled scan frame into display strings.
+
+        Each distinct value is formatted once, so e.g. NED is parsed once per
+        ticker and Exp once per expiry rather than once per row.
+        """
+        return df.assign(
+            **{
+                col: _format_distinct(df[col], formatter)
+                for col, formatter in DISPLAY_FORMATTERS.items()
+                if col in df
+            }
+        )
+
+    def get_strike_range(
+        self, market_price: float, min_strike: float = 30, max_strike: float = 20
+    ) -> typing.Tuple[int, int]:
+        assert (
+            0 < max_strike < 100
+        ), "max strike should be expressed as a percentage below market price (> 0 and < 100)"
+        assert (
+            0 < min_strike < 100
+        ), "min strike should be expressed as a percentage below market price (> 0 and < 100)"
+        assert (
+            min_strike > max_strike
+        ), "strikes should be expressed as a percentage below market price (and thus min_strike must be > max_strike)"
+
+        # convert min and max strike from percentage to decimal
+        max_strike = int(market_price * (1 - (max_strike / 100)))
+        min_strike = int(market_price * (1 - (min_strike / 100)))
+        log.debug(
+            f"Restricting strike price to ({min_strike}, {max_strike}) for {market_price} market price."
+        )
+        return min_strike, max_strike
+
+    def get_valid_strikes(
+        self,
+        market_price: float,
+        min_strike: float = 30,
+        max_strike: float = 20,
+        increment: float = 1,
+    ) -> typing.Set[int]:
+        assert (
+            increment in VALID_INCREMENTS
+        ), f"increment should be one {VALID_INCREMENTS}"
+        min_strike, max_strike = self.get_strike_range(
+            market_price, min_strike, max_strike
+        )
+        return {
+            strike
+            for strike in range(min_strike, max_strike)
+            if strike % increment == 0
+        }
+
+    def get_chain_params(self, valid_strikes: typing.Set[int]) -> typing.Dict:
+        """Request only puts in the strike window instead of the full chain."""
+        # valid strikes are whole dollar buckets, so the window is [low, high + 1)
+        low, high = min(valid_strikes), max(valid_strikes) + 1
+        return {
+            "chain_type": "put",
+            "price_type": "all",
+            "strike_price_near": (low + high) / 2,
+            # leave room for half dollar strikes plus one strike either side
+            "no_of_strikes": 2 * (high - low) + 2,
+        }
+
+    def _get_cached_chain(
+        self,
+        ticker: str,
+        expiry_date: datetime.date,
+        valid_strikes: typing.Set[int],
+    ) -> typing.Optional[typing.Dict]:
+        entry = self.chain_cache.get((ticker, expiry_date))
+        if entry is None:
+            return None
+
+        # a cached window is only reusable if it covers every requested strike
+        (low, high), response = entry
+        if low <= min(valid_strikes) and max(valid_strikes) <= high:
+            return response
+        return None
+
+    def _cache_chain(
+        self,
+        ticker: str,
+        expiry_date: datetime.date,
+        valid_strikes: typing.Set[int],
+        response: typing.Dict,
+    ):
+        self.chain_cache.set(
+            (ticker, expiry_date),
+            ((min(valid_strikes), max(valid_strikes)), response),
+        )
+
+    def _cache_expiry_dates(self, ticker: str, response: typing.Dict):
+        # calendars only change once a day, so keep them until the next trading day
+        self.expiry_cache.set(ticker, response, ttl=_expiry_calendar_ttl())
+
+    def _parse_quotes(
+        self, tickers: typing.List[str], response: typing.Dict
+    ) -> typing.Dict[str, MarketData]:
+        quote_data = response["QuoteResponse"].get("QuoteData", [])
+
+        # a single quote is not wrapped in a list by the xml parser
+        if isinstance(quote_data, dict):
+            quote_data = [quote_data]
+
+        requested = {ticker.upper(): ticker for ticker in tickers}
+        result = {}
+        for quote in quote_data:
+            ticker = requested.get(quote["Product"]["symbol"].upper())
+            if ticker is None:
+                continue
+            try:
+                result[ticker] = self.process_quote_object(ticker, quote["All"])
+            except (KeyError, TypeError, ValueError, ZeroDivisionError) as ex:
+                log.error(f"Skipping quote for ticker '{ticker}' due to error: {ex}")
+                self._skip_ticker(ticker, "quote", type(ex).__name__)
+
+        return result
+
+    def _parse_expiry_dates(
+        self,
+        ticker: str,
+        response: typing.Dict,
+        month_look_ahead: int = 3,
+        include_next_earnings_date: bool = True,
+    ) -> typing.List[datetime.date]:
+        # an empty root element is parsed to None
+        dates = (response.get("OptionExpireDateResponse") or {}).get("ExpirationDate")
+        if not dates:
+            log.error(f"Skipping ticker '{ticker}' due to no expiry dates in response")
+            self._skip_ticker(ticker, "expiry_dates", "no_expiry_dates")
+            return []
+        # a single date is not wrapped in a list by the xml parser
+        if isinstance(dates, dict):
+            dates = [dates]
+
+        if any(isinstance(date, str) for date in dates):
+            log.error(f"Skipping ticker '{ticker}' due to bad expiry dates: {dates}")
+            self._skip_ticker(ticker, "expiry_dates", "bad_expiry_dates")
+            return []
+
+        # a calendar cached before the weekend can still list the last expiry
+        today = datetime.datetime.now(tz=MARKET_TIMEZONE).date()
+        monthly_dates = [
+            datetime.date(
+                year=int(date["year"]), month=int(date["month"]), day=int(date["day"])
+            )
+            for date in dates
+            if date["expiryType"] == "MONTHLY"
+        ]
+        monthly_dates = [date for date in monthly_dates if date >= today]
+        return monthly_dates[0 if include_next_earnings_date else 1 : month_look_ahead]
+
+    def _parse_puts(
+        self,
+        ticker: str,
+        expiry_date: datetime.date,
+        response: typing.Dict,
+        market_price: float,
+        valid_strikes: typing.Set[int],
+    ) -> typing.Optional[Puts]:
+        # an empty root element is parsed to None
+        response = response.get("OptionChainResponse") or {}
+
+        if "OptionPair" not in response.keys():
+            log.error(
+                f"Skipping ticker '{ticker}' due to no 'OptionPair' key in response"
+            )
+            self._skip_ticker(ticker, "chain", "no_option_pair")
+            return None
+
+        # an empty element is parsed to None, and a single pair is not wrapped in
+        # a list by the xml parser
+        option_pairs = response["OptionPair"] or []
+        if isinstance(option_pairs, dict):
+            option_pairs = [option_pairs]
+
+        puts = [
+            option_pair["Put"]
+            for option_pair in option_pairs
+            if int(float(option_pair["Put"]["strikePrice"])) in valid_strikes
+        ]
+        return self._chain_puts(puts, expiry_date, market_price)
+
+    def _chain_puts(
+        self,
+        puts: typing.List[typing.Dict],
+        expiry_date: typing.Optional[datetime.date],
+        market_price: float,
+    ) -> Puts:
+        """PUT_INFO_TO_INCLUDE and iv of a chain's api puts, parsed to their types
+        column by column, with the chain's expiry date and market price."""
+        iv = np.empty(len(puts), dtype=object)
+        iv[:] = [put["OptionGreeks"]["iv"] for put in puts]
+        return Puts.parse(puts, PUT_INFO_TYPES).assign(
+            iv=iv.astype(np.float64),
+            expiryDate=np.full(len(puts), expiry_date, dtype=object),
+            marketPrice=np.full(len(puts), market_price, dtype=np.float64),
+        )
+
+    def filter_puts(
+        self,
+        ticker: str,
+        valid_puts: Puts,
+        min_volume: int = 1,
+        min_open_interest: int = 1,
+        min_annualized_return: float = 0.0,
+        contracts_to_buy: int = 1,
+    ) -> Puts:
+        log.debug(
+            f"Found {len(valid_puts)} options for specified expiry dates and strikes."
+        )
+
+        # augment puts with custom calculated fields
+        valid_puts = self.process_puts(valid_puts, contracts_to_buy)
+
+        # filter based on min volume
+        check = valid_puts["volume"] >= min_volume
+        if not check.all():
+            log.debug(f"Hiding {(~check).sum()} puts due to min volume filter.")
+        valid = check
+
+        # filter based on min open interest
+        check = valid_puts["openInterest"] >= min_open_interest
+        if not check[valid].all():
+            log.debug(
+                f"Hiding {(valid & ~check).sum()} puts due to min open interest filter."
+            )
+        valid &= check
+
+        # filter based on min annualized return
+        check = (
+            valid_puts["annualizedReturn"]
+            >= min_annualized_return
+            / 100  # GUI specifies percentage as 11 instead of .11
+        )
+        if not check[valid].all():
+            log.debug(
+                f"Hiding {(valid & ~check).sum()} puts due to min annualized return filter."
+            )
+        valid &= check
+
+        valid_puts = valid_puts.take(valid)
+        log.info(f"Found {len(valid_puts)} valid options for ticker {ticker}.")
+
+        return valid_puts
+
+    def _snapshot_chain(self, ticker: str, puts: typing.Optional[Puts]):
+        """Keep every put of a freshly fetched chain, not just the ones that pass
+        the filters. Chains served from the chain cache were already kept."""
+        if self.snapshot_store is not None and puts is not None:
+            self._append_snapshot(ticker, self.process_puts(puts, 1))
+
+    def _append_snapshot(self, ticker: str, puts: Puts):
+        # only queued here, the store writes in the background
+        if self.snapshot_store is None:
+            return
+        try:
+            self.snapshot_store.append(puts.to_frame())
+        except Exception as ex:
+            log.error(f"Failed to queue snapshot for {ticker}: {ex}")
+
+    def process_quote_object(self, ticker: str, all_data: typing.Dict) -> MarketData:
+        market_price = round(float(all_data["lastTrade"]), 2)
+        high_52 = round(float(all_data["high52"]), 2)
+        low_52 = round(float(all_data["low52"]), 2)
+        range_52 = high_52 - low_52
+        percentile_52 = round((market_price - low_52) / range_52, 2)
+        return MarketData(
+            ticker=ticker,
+            company_name=str(all_data["companyName"]),
+            market_price=market_price,
+            high_52=high_52,
+            low_52=low_52,
+            percentile_52=percentile_52,
+            beta=float(all_data["beta"]),
+            next_earnings_date=str(all_data["nextEarningDate"]),
+        )
+
+    def process_puts(self, puts: Puts, contracts_to_buy: int) -> Puts:
+        return puts.assign(
+            iv=_round(puts["iv"], 2),
+            **_put_metrics(
+                market_price=puts["marketPrice"],
+                strike_price=puts["strikePrice"],
+                bid=puts["bid"],
+                ask=puts["ask"],
+                volume=puts["volume"],
+                days_to_hold=_days_to_expiry(puts["expiryDate"]),
+                contracts_to_buy=contracts_to_buy,
+            ),
+        )
+
+    @metrics.span("reprice_puts")
+    def reprice_puts(
+        self,
+        puts: typing.Union[Puts, pd.DataFrame],
+        what_if: pricing.WhatIf,
+        labelled: bool = False,
+    ) -> typing.Union[Puts, pd.DataFrame]:
+        """Add the WHAT_IF_INFO columns: the implied volatility of each put's mid
+        price, and its greeks, revenue and annualized return if it were sold in
+        the what_if market instead.
+
+        Everything is computed from the puts' own quotes, so trying another
+        what-if on processed puts, or with ``labelled`` on a labelled scan frame,
+        makes no requests.
+        """
+        if not len(puts):
+            return puts
+
+        def column(name, dtype=np.float64):
+            return np.asarray(puts[DISPLAY_LABELS[name] if labelled else name], dtype)
+
+        spot = column("marketPrice")
+        strike = column("strikePrice")
+        bid = column("bid")
+        ask = column("ask")
+        days = _days_to_expiry(column("expiryDate", object))
+        # notional principle is strike * 100 * contracts
+        contracts = (column("notionalPrinciple") / (strike * 100)).round()
+
+        iv = pricing.implied_volatility(
+            (bid + ask) / 2, spot, strike, days / pricing.DAYS_PER_YEAR
+        )
+        spot = spot * (1 + what_if.price_change)
+        days_left = days - what_if.days_forward
+        years_left = days_left / pricing.DAYS_PER_YEAR
+        price = pricing.put_price(spot, strike, years_left, iv)
+        # a put without an implied volatility (e.g. no bid or ask) is only worth
+        # its intrinsic value
+        price = np.where(np.isnan(price), np.maximum(strike - spot, 0), price)
+        greeks = pricing.put_greeks(spot, strike, years_left, iv)
+
+        revenue = price * 100 * contracts
+        annualize_factor = np.divide(
+            365, days_left, out=np.zeros(len(days_left)), where=days_left > 0
+        )
+        columns = {
+            "modelIv": iv.round(4),
+            "delta": greeks["delta"].round(3),
+            "theta": (greeks["theta"] / pricing.DAYS_PER_YEAR).round(3),
+            "whatIfRevenue": revenue.round(2),
+            "whatIfAnnualizedReturn": (
+                revenue / (strike * 100) * annualize_factor
+            ).round(4),
+        }
+        return puts.assign(
+            **{
+                (DISPLAY_LABELS[name] if labelled else name): values
+                for name, values in columns.items()
+            }
+        )
+
+    def _puts_to_dicts(self, valid_puts: Puts) -> typing.List[typing.Dict]:
+        """One dict per put, with native python values, as get_options_info
+        returns them."""
+        columns = {key: values.tolist() for key, values in valid_puts.fields.items()}
+        puts = []
+        for i in range(len(valid_puts)):
+            row = {key: values[i] for key, values in columns.items()}
+            put = {
+                key: row[key]
+                for key in PUT_INFO_TO_INCLUDE
+                if key != "OptionGreeks" and row[key] is not None
+            }
+            put["OptionGreeks"] = {**row["OptionGreeks"], "iv": row["iv"]}
+            put["expiryDate"] = row["expiryDate"]
+            put["marketPrice"] = row["marketPrice"]
+            put["belowMarketPct"] = row["belowMarketPct"]
+            put["auxiliaryInfo"] = {key: row[key] for key in AUXILIARY_INFO}
+            if "whatIfAnnualizedReturn" in row:
+                put["whatIf"] = {key: row[key] for key in WHAT_IF_INFO}
+            puts.append(put)
+        return puts
+
+
+class OptionsManager(BaseOptionsManager):
     def __init__(
         self,
         consumer_key: str,
         consumer_secret: str,
         oauth_token: str,
         oauth_secret: str,
+        quote_cache: typing.Optional[Cache] = None,
+        thread_count: int = DEFAULT_THREAD_COUNT,
+        rate_limiter: typing.Optional[RateLimiter] = None,
+        chain_cache: typing.Optional[Cache] = None,
+        expiry_cache: typing.Optional[Cache] = None,
+        scan_flights: typing.Optional[SingleFlight] = None,
+        snapshot_store: typing.Optional["SnapshotStore"] = None,
+        failed_tickers: typing.Optional[Cache] = None,
+        circuit_breaker: typing.Optional[CircuitBreaker] = None,
     ):
+        super().__init__(
+            quote_cache=quote_cache,
+            rate_limiter=rate_limiter,
+            chain_cache=chain_cache,
+            expiry_cache=expiry_cache,
+            snapshot_store=snapshot_store,
+            failed_tickers=failed_tickers,
+            circuit_breaker=circuit_breaker,
+        )
+        self.scan_flights = SCAN_FLIGHTS if scan_flights is None else scan_flights
         self.consumer_key = consumer_key
         self.consumer_secret = consumer_secret
         self.oauth_token = oauth_token
@@ -74,11 +1160,27 @@ class OptionsManager:
             dev=False,
         )
 
-    def get_csv_df(self):
-        sector_path = pathlib.Path(__file__).parent / "data" / "sectors.csv"
-        csv_df = pd.read_csv(sector_path)
-        csv_df.fillna("", inplace=True)
-        return csv_df
+        self.thread_count = thread_count
+
+        # keep one warm keep-alive connection per scan thread
+        for session in (self.market.session, self.accounts.session):
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=thread_count)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+    def _request(self, method: typing.Callable, *args, **kwargs):
+        ticker = kwargs.get("underlier")
+        # an open circuit fails fast, without waiting on the limiter
+        with self.circuit_breaker.guard(method.__name__):
+            metrics.API_CALLS.inc(endpoint=method.__name__)
+            budget = _REQUEST_BUDGET.get()
+            if budget is not None:
+                budget.charge()
+            start = time.perf_counter()
+            with self.rate_limiter.limit():
+                metrics.observe("rate_limit_wait", time.perf_counter() - start, ticker)
+                with metrics.span(method.__name__, ticker):
+                    return method(*args, **kwargs)
 
     def get_all_options_info(
         self,
@@ -93,161 +1195,357 @@ class OptionsManager:
         min_annualized_return: float = 0.0,
         include_next_earnings_date: bool = True,
         blue_chip_only: bool = False,
+        time_budget: typing.Optional[float] = None,
+        format_values: bool = True,
+        top_k: typing.Optional[int] = None,
+        rank_by: str = "annualizedReturn",
     ):
-        csv_df = self.get_csv_df()
+        """Puts for the screened tickers of a sector or sub-sector, with display
+        columns. With ``format_values`` off they keep their types, to be formatted
+        when rendered, e.g. with ``df.to_html(formatters=DISPLAY_FORMATTERS)``.
+
+        With a ``time_budget`` (seconds), tickers are scanned best pre-score first
+        and no new requests are started once the budget is nearly spent. Whatever
+        finished is returned, and the tickers that weren't (fully) scanned are
+        listed in ``df.attrs["unscanned"]``.
+
+        With ``top_k``, only the best top_k puts by ``rank_by`` (one of
+        RANK_COLUMNS) are returned, best first. They are kept in a bounded heap
+        as chains arrive instead of collecting every put in a frame.
+        """
+        df = self.get_all_options_frame(
+            sector=sector,
+            sub_sector=sub_sector,
+            percentile_of_52_range=percentile_of_52_range,
+            min_strike=min_strike,
+            max_strike=max_strike,
+            month_look_ahead=month_look_ahead,
+            min_volume=min_volume,
+            min_open_interest=min_open_interest,
+            min_annualized_return=min_annualized_return,
+            include_next_earnings_date=include_next_earnings_date,
+            blue_chip_only=blue_chip_only,
+            time_budget=time_budget,
+            top_k=top_k,
+            rank_by=rank_by,
+        )
+        if df.empty or not format_values:
+            return df
+        return self.format_display_values(df)
+
+    def get_all_options_frame(
+        self,
+        sector="Communication Services",
+        sub_sector="Comm - Media & Ent",
+        percentile_of_52_range: int = 25,
+        min_strike: float = 30,
+        max_strike: float = 20,
+        month_look_ahead: int = 3,
+        min_volume: int = 1,
+        min_open_interest: int = 1,
+        min_annualized_return: float = 0.0,
+        include_next_earnings_date: bool = True,
+        blue_chip_only: bool = False,
+        time_budget: typing.Optional[float] = None,
+        top_k: typing.Optional[int] = None,
+        rank_by: str = "annualizedReturn",
+        request_budget: typing.Optional[RequestBudget] = None,
+    ) -> pd.DataFrame:
+        """Like get_all_options_info, but with display columns left as typed values.
 
-        # filter csv_df down by sector (if None, don't filter)
-        if sector:
-            csv_df = csv_df.loc[csv_df["Sector"] == sector]
+        A scan with the same parameters as one already running joins it and
+        shares its result instead of starting again, so the frame must not be
+        modified by the caller. With a ``request_budget``, it's scanned like
+        with a time budget, but stops once the budget's requests are spent. Such
+        a scan never joins another, so only its own requests are charged.
+        """
+        assert rank_by in RANK_COLUMNS, f"rank_by should be one of {RANK_COLUMNS}"
+        scan_args = dict(
+            sector=sector,
+            sub_sector=sub_sector,
+            percentile_of_52_range=int(percentile_of_52_range),
+            min_strike=float(min_strike),
+            max_strike=float(max_strike),
+            month_look_ahead=int(month_look_ahead),
+            min_volume=int(min_volume),
+            min_open_interest=int(min_open_interest),
+            min_annualized_return=float(min_annualized_return),
+            include_next_earnings_date=bool(include_next_earnings_date),
+            blue_chip_only=bool(blue_chip_only),
+            time_budget=float(time_budget) if time_budget else None,
+            top_k=int(top_k) if top_k else None,
+            rank_by=rank_by,
+            request_budget=request_budget,
+        )
+        key = tuple(scan_args.items())
+        return self.scan_flights.do(key, self._run_scan, **scan_args)
 
-        # filter csv_df down by sub-sector (if None, don't filter)
-        if sub_sector:
-            csv_df = csv_df.loc[csv_df["Sub-Sector"] == sub_sector]
+    def _run_scan(self, **scan_args) -> pd.DataFrame:
+        # without a flush interval the whole scan arrives as a single batch
+        batches = list(self._iter_scan_frames(**scan_args))
+        if not batches:
+            return pd.DataFrame()
+        return self._label_options_frame(batches[0])
 
-        if blue_chip_only:
-            csv_df = csv_df.loc[csv_df["Blue Chip"] == "Yes"]
+    def iter_all_options_info(
+        self,
+        flush_interval: float = 0.5,
+        **scan_args,
+    ) -> typing.Iterator[pd.DataFrame]:
+        """Like get_all_options_info, but yield formatted rows as tickers complete.
 
-        # skip some buggy tickers
-        skip = ["NVR", "KSU"]
-        tickers = [ticker for ticker in csv_df["Ticker"].unique() if ticker not in skip]
+        Tickers whose chains have all arrived are batched together and yielded at
+        most every ``flush_interval`` seconds.
+        """
+        for df in self._iter_scan_frames(flush_interval=flush_interval, **scan_args):
+            df = self._format_options_frame(df)
+            if not df.empty or df.attrs.get("unscanned"):
+                yield df
 
-        def helper(ticker):
+    def _iter_scan_frames(
+        self,
+        sector="Communication Services",
+        sub_sector="Comm - Media & Ent",
+        percentile_of_52_range: int = 25,
+        min_strike: float = 30,
+        max_strike: float = 20,
+        month_look_ahead: int = 3,
+        min_volume: int = 1,
+        min_open_interest: int = 1,
+        min_annualized_return: float = 0.0,
+        include_next_earnings_date: bool = True,
+        blue_chip_only: bool = False,
+        time_budget: typing.Optional[float] = None,
+        top_k: typing.Optional[int] = None,
+        rank_by: str = "annualizedReturn",
+        flush_interval: typing.Optional[float] = None,
+        request_budget: typing.Optional[RequestBudget] = None,
+    ) -> typing.Iterator[pd.DataFrame]:
+        deadline = None
+        if time_budget:
+            deadline = time.monotonic() + time_budget - DEADLINE_MARGIN
+        budgeted = deadline is not None or request_budget is not None
+        tickers = self._get_scan_tickers(sector, sub_sector, blue_chip_only)
+
+        # screen the whole universe on 52 week percentile before requesting any chains
+        try:
+            all_market_data, unquoted = _bind_request_budget(
+                self._get_market_data_bulk, request_budget
+            )(tickers)
+        except Exception as ex:
+            log.error(f"Failed to fetch quotes for {len(tickers)} tickers: {ex}")
+            metrics.SKIPPED_TICKERS.inc(
+                len(tickers), stage="quote", reason=type(ex).__name__
+            )
+            return
+        # tickers whose quote request failed were already counted as skipped
+        failed = set(unquoted)
+        tickers = self._screen_tickers(
+            [ticker for ticker in tickers if ticker not in failed],
+            all_market_data,
+            percentile_of_52_range,
+        )
+        if budgeted:
+            # requests are started in ticker order, so the best get scanned first
+            tickers = self._prioritize_tickers(tickers, all_market_data)
+
+        valid_strikes = {
+            ticker: self.get_valid_strikes(
+                all_market_data[ticker].market_price, min_strike, max_strike
+            )
+            for ticker in tickers
+        }
+
+        unscanned = set()
+        # in top-K mode only the best puts are kept, and yielded once at the end
+        top = TopK(top_k) if top_k else None
+
+        def out_of_budget(ticker):
+            if (deadline is None or time.monotonic() < deadline) and (
+                request_budget is None or request_budget.remaining
+            ):
+                return False
+            unscanned.add(ticker)
+            return True
+
+        def expiry_helper(ticker):
+            if out_of_budget(ticker):
+                return []
             try:
-                market_data = self.get_market_data(ticker)
+                return self.get_expiry_dates(
+                    ticker, month_look_ahead, include_next_earnings_date
+                )
             except Exception as ex:
                 log.error(f"Skipping ticker '{ticker}' due to error: {ex}")
-                return pd.DataFrame()
-
-            if market_data.percentile_52 * 100 > percentile_of_52_range:
-                return pd.DataFrame()
+                self._skip_ticker_on_error(ticker, "expiry_dates", ex)
+                return []
 
+        def chain_helper(work_item):
+            ticker, expiry_date = work_item
+            if out_of_budget(ticker):
+                return ticker, expiry_date, None
             try:
-                options_info = self.get_options_info(
-                    ticker=ticker,
-                    min_strike=min_strike,
-                    max_strike=max_strike,
-                    increment=1,
-                    month_look_ahead=month_look_ahead,
+                if top is None:
+                    puts = self.get_puts(
+                        ticker,
+                        expiry_date,
+                        all_market_data[ticker].market_price,
+                        valid_strikes[ticker],
+                    )
+                else:
+                    puts = self.get_top_puts(
+                        ticker,
+                        expiry_date,
+                        all_market_data[ticker].market_price,
+                        valid_strikes[ticker],
+                        top_k,
+                        rank_by=rank_by,
+                        min_volume=min_volume,
+                        min_open_interest=min_open_interest,
+                        min_annualized_return=min_annualized_return,
+                    )
+            except Exception as ex:
+                log.error(f"Skipping {ticker} {expiry_date} due to error: {ex}")
+                self._skip_ticker_on_error(ticker, "chain", ex)
+                puts = None
+            return ticker, expiry_date, puts
+
+        def flush(completed):
+            if top is not None:
+                log.info(f"Kept the top {len(top)} of {top.pushed} puts by {rank_by}.")
+                df = self._get_top_frame(top, all_market_data)
+            else:
+                df = self._get_scan_frame(
+                    self._collect_puts(
+                        {ticker: expiry_dates[ticker] for ticker in completed},
+                        [chain for ticker in completed for chain in chains[ticker]],
+                    ),
+                    all_market_data,
                     min_volume=min_volume,
                     min_open_interest=min_open_interest,
                     min_annualized_return=min_annualized_return,
-                    include_next_earnings_date=include_next_earnings_date,
                 )
-            except xml.parsers.expat.ExpatError as ex:
-                log.error(f"Skipping {ticker} due to error: {ex}")
-                return pd.DataFrame()
-
-            data = []
-            for option in options_info:
-                option_data = {}
-                for key, value in option.items():
-                    if not isinstance(value, dict):
-                        option_data[key] = value
-                    elif key == "auxiliaryInfo":
-                        for inner_key, inner_val in value.items():
-                            option_data[inner_key] = inner_val
-                option_data["Company"] = market_data.company_name[0:15]
-                option_data["52%"] = market_data.percentile_52
-                option_data["52Lo"] = market_data.low_52
-                option_data["52Hi"] = market_data.high_52
-                option_data["NED"] = market_data.next_earnings_date
-                data.append(option_data)
-            return pd.DataFrame(data)
-
-        thread_pool = ThreadPool(6)
+            if unscanned or unquoted:
+                # in priority order, and including tickers left partly scanned,
+                # then the ones whose quotes couldn't be fetched
+                df.attrs["unscanned"] = [
+                    *(t for t in tickers if t in unscanned),
+                    *unquoted,
+                ]
+            return df
 
         ## sequential snippet for debugging
-        # results = []
-        # for i in tickers:
-        #     results.append(helper(i))
+        # expiry_dates = {i: expiry_helper(i) for i in tickers}
+        # chains = [chain_helper((i, d)) for i in tickers for d in expiry_dates[i]]
 
-        results = thread_pool.map(helper, tickers)
-        df = pd.concat(results)
+        def expiry_task(ticker):
+            return "expiry", ticker, expiry_helper(ticker)
 
-        if df.empty:
-            return pd.DataFrame()
+        def chain_task(work_item):
+            return "chain", work_item[0], chain_helper(work_item)
 
-        # add sector and sub-sector columns to final df
-        ticker_to_sector = dict(zip(csv_df["Ticker"], csv_df["Sector"]))
-        ticker_to_sub_sector = dict(zip(csv_df["Ticker"], csv_df["Sub-Sector"]))
-        df["Sector"] = df["symbol"].map(ticker_to_sector)
-        df["Sub-Sector"] = df["symbol"].map(ticker_to_sub_sector)
-
-        # rename columns
-        df.rename(
-            columns={
-                "symbol": "Ticker",
-                "strikePrice": "Stk",
-                "bid": "B",
-                "ask": "A",
-                "volume": "V",
-                "openInterest": "OI",
-                "netChange": "C",
-                "lastPrice": "L",
-                "expiryDate": "Exp",
-                "marketPrice": "Price",
-                "annualizedReturn": "A%",
-                "annualizedRevenue": "A$",
-                "belowMarketPct": "BM",
-                "revenue": "$",
-                "notionalPrinciple": "NP",
-                "contractsToBuy": "NC",
-            },
-            inplace=True,
-        )
-
-        # drop some columns
-        df.drop(["optionType", "NC", "A$"], axis=1, inplace=True)
-
-        # reorder some columns
-        df_cols = df.columns.to_list()
-        new_cols = [
-            "Ticker",
-            "Company",
-            "52%",
-            "Price",
-            "Exp",
-            "Stk",
-            "BM",
-            "A%",
-            "$",
-            "NP",
-            "B",
-            "A",
-            "L",
-            "C",
-            "V",
-            "OI",
-            "52Lo",
-            "52Hi",
-            "NED",
-        ]
-        final_cols = [*new_cols, *[col for col in df_cols if col not in new_cols]]
-        df = df[final_cols]
+        # with a time or request budget, tickers are scanned in rounds in priority
+        # order, so the best ones finish before the expiry dates of the rest are
+        # requested
+        round_size = len(tickers)
+        if budgeted:
+            round_size = self.thread_count * BUDGET_ROUND_SIZE
+        # workers record their spans into the timings of the calling request, and
+        # charge their requests to the scan's budget
+        expiry_task = metrics.bind_timings(
+            _bind_request_budget(expiry_task, request_budget)
+        )
+        chain_task = metrics.bind_timings(
+            _bind_request_budget(chain_task, request_budget)
+        )
 
-        def process_ned(dt):
-            try:
-                return datetime.datetime.strptime(dt, "%m/%d/%Y").strftime("%m/%d/%y")
-            except Exception:
-                return dt
-
-        # modify format of columns
-        df["Exp"] = df["Exp"].apply(lambda dt: dt.strftime("%m/%d/%y"))
-        df["NED"] = df["NED"].apply(process_ned)
-        df["52%"] = df["52%"].apply(lambda x: "{:.0%}".format(x))
-        df["BM"] = df["BM"].apply(lambda x: "{:.1%}".format(x) + " BM")
-        df["A%"] = df["A%"].apply(lambda x: "{:.2%}".format(x) + " AR")
-        df["$"] = df["$"].apply(lambda x: "${:}".format(x))
-        df["NP"] = df["NP"].apply(lambda x: "${:,}".format(x))
+        expiry_dates = {}
+        chains = {ticker: [] for ticker in tickers}
+        completed = []
+        flushed_at = time.monotonic()
+        with ThreadPool(self.thread_count) as thread_pool:
+            for i in range(0, len(tickers), max(round_size, 1)):
+                round_tickers = tickers[i : i + round_size]
+                # a ticker's chains are queued as soon as its expiry dates arrive,
+                # ahead of the next ticker's expiry lookup, so chain requests
+                # don't wait for every expiry lookup and the pool stays busy
+                # across both. Tickers also finish in about the order they start.
+                results = queue.Queue()
+                next_tickers = iter(round_tickers)
+                pending = 0
+                requested = 0
 
-        return df
+                def submit(task, arg):
+                    nonlocal pending
+                    pending += 1
+                    thread_pool.apply_async(
+                        task, (arg,), callback=results.put, error_callback=results.put
+                    )
+
+                for ticker in itertools.islice(next_tickers, self.thread_count):
+                    submit(expiry_task, ticker)
+
+                while pending:
+                    result = results.get()
+                    pending -= 1
+                    if isinstance(result, BaseException):
+                        raise result
+                    kind, ticker, value = result
+                    if kind == "expiry":
+                        expiry_dates[ticker] = value
+                        # one work item per (ticker, expiry) so no worker is tied
+                        # up by a single ticker
+                        for expiry_date in value:
+                            submit(chain_task, (ticker, expiry_date))
+                        requested += len(value)
+                        for ticker in itertools.islice(next_tickers, 1):
+                            submit(expiry_task, ticker)
+                        continue
+
+                    chains[ticker].append(value)
+                    if len(chains[ticker]) == len(expiry_dates[ticker]):
+                        if top is None:
+                            completed.append(ticker)
+                        else:
+                            # a finished ticker's puts go on the heap and are dropped
+                            self._push_top_puts(
+                                top,
+                                ticker,
+                                expiry_dates[ticker],
+                                chains.pop(ticker),
+                                rank_by=rank_by,
+                            )
+
+                    if (
+                        flush_interval is not None
+                        and completed
+                        and time.monotonic() - flushed_at >= flush_interval
+                    ):
+                        yield flush(completed)
+                        completed = []
+                        flushed_at = time.monotonic()
+                log.info(f"Requested {requested} option chains.")
+
+        if unscanned:
+            if request_budget is not None and not request_budget.remaining:
+                budget, reason = f"Request budget of {request_budget.limit}", "request"
+            else:
+                budget, reason = f"Time budget of {time_budget}s", "time"
+            log.warning(
+                f"{budget} ran out before {len(unscanned)} tickers were scanned."
+            )
+            metrics.SKIPPED_TICKERS.inc(
+                len(unscanned), stage="scan", reason=f"{reason}_budget"
+            )
+        if (
+            completed
+            or flush_interval is None
+            or unscanned
+            or unquoted
+            or top is not None
+        ):
+            yield flush(completed)
 
-    @retry(
-        stop=stop_after_attempt(10),
-        wait=wait_exponential(multiplier=0.1),
-        reraise=True,
-        retry=retry_if_exception_type(requests.exceptions.HTTPError),
-    )
     def get_options_info(
         self,
         ticker: str,
@@ -260,28 +1558,17 @@ class OptionsManager:
         min_annualized_return: float = 0.0,
         contracts_to_buy: int = 1,
         include_next_earnings_date: bool = True,
+        market_data: typing.Optional[MarketData] = None,
+        what_if: typing.Optional[pricing.WhatIf] = None,
     ):
-        assert (
-            0 < max_strike < 100
-        ), "max strike should be expressed as a percentage below market price (> 0 and < 100)"
-        assert (
-            0 < min_strike < 100
-        ), "min strike should be expressed as a percentage below market price (> 0 and < 100)"
-        assert (
-            min_strike > max_strike
-        ), "strikes should be expressed as a percentage below market price (and thus min_strike must be > max_strike)"
-        assert (
-            increment in VALID_INCREMENTS
-        ), f"increment should be one {VALID_INCREMENTS}"
         log.debug(f"Finding options for ticker: {ticker}")
 
-        market_price = self.get_market_data(ticker).market_price
+        if market_data is None:
+            market_data = self.get_market_data(ticker)
+        market_price = market_data.market_price
 
-        # convert min and max strike from percentage to decimal
-        max_strike = int(market_price * (1 - (max_strike / 100)))
-        min_strike = int(market_price * (1 - (min_strike / 100)))
-        log.debug(
-            f"Restricting strike price to ({min_strike}, {max_strike}) for {market_price} market price."
+        valid_strikes = self.get_valid_strikes(
+            market_price, min_strike, max_strike, increment
         )
 
         valid_expiry_dates = self.get_expiry_dates(
@@ -291,162 +1578,207 @@ class OptionsManager:
             f"Restricting search to {len(valid_expiry_dates)} valid expiry dates."
         )
 
-        valid_strikes = [
-            strike
-            for strike in range(min_strike, max_strike)
-            if strike % increment == 0
-        ]
-
         valid_puts = []
         for date in valid_expiry_dates:
-            response = self.market.get_option_chains(
-                underlier=ticker, expiry_date=date
-            )["OptionChainResponse"]
-
-            if "OptionPair" not in response.keys():
-                log.error(
-                    f"Skipping ticker '{ticker}' due to no 'OptionPair' key in response"
-                )
+            puts = self.get_puts(ticker, date, market_price, valid_strikes)
+            if puts is None:
                 break
+            valid_puts.append(puts)
 
-            option_pairs_for_date = response["OptionPair"]
-            for option_pair in option_pairs_for_date:
-                put = option_pair["Put"]
-                if int(float(put["strikePrice"])) in valid_strikes:
-                    put = {
-                        key: value
-                        for key, value in put.items()
-                        if key in PUT_INFO_TO_INCLUDE
-                    }
-                    put["expiryDate"] = date
-                    put["marketPrice"] = market_price
-                    valid_puts.append(put)
+        with metrics.span("filter_puts", ticker):
+            valid_puts = self.filter_puts(
+                ticker,
+                self._concat_puts(valid_puts),
+                min_volume=min_volume,
+                min_open_interest=min_open_interest,
+                min_annualized_return=min_annualized_return,
+                contracts_to_buy=contracts_to_buy,
+            )
+        if what_if is not None:
+            valid_puts = self.reprice_puts(valid_puts, what_if)
+        return self._puts_to_dicts(valid_puts)
 
-        log.debug(
-            f"Found {len(valid_puts)} options for specified expiry dates and strikes."
+    @retry(
+        stop=stop_after_attempt(10),
+        wait=wait_exponential(multiplier=0.1),
+        reraise=True,
+        before_sleep=metrics.count_retry,
+        retry=retry_if_exception(_is_retryable),
+    )
+    def _get_chain(
+        self,
+        ticker: str,
+        expiry_date: datetime.date,
+        valid_strikes: typing.Set[int],
+    ) -> typing.Tuple[typing.Dict, bool]:
+        """The chain's response, and whether it was fetched rather than cached."""
+        response = self._get_cached_chain(ticker, expiry_date, valid_strikes)
+        if response is not None:
+            return response, False
+        response = self._request(
+            self.market.get_option_chains,
+            underlier=ticker,
+            expiry_date=expiry_date,
+            **self.get_chain_params(valid_strikes),
         )
+        self._cache_chain(ticker, expiry_date, valid_strikes, response)
+        return response, True
 
-        # augment put objects with custom calculated fields
-        valid_puts = [
-            self.process_put_object(put, contracts_to_buy) for put in valid_puts
-        ]
-
-        # filter based on min volume
-        check = lambda put: int(put["volume"]) >= min_volume
-        invalid_puts = [put for put in valid_puts if not check(put)]
-        valid_puts = [put for put in valid_puts if check(put)]
-        if invalid_puts:
-            log.debug(f"Hiding {len(invalid_puts)} puts due to min volume filter.")
+    def get_puts(
+        self,
+        ticker: str,
+        expiry_date: datetime.date,
+        market_price: float,
+        valid_strikes: typing.Set[int],
+    ) -> typing.Optional[Puts]:
+        if not valid_strikes:
+            return self._empty_puts()
 
-        # filter based on min open interest
-        check = lambda put: int(put["openInterest"]) >= min_open_interest
-        invalid_puts = [put for put in valid_puts if not check(put)]
-        valid_puts = [put for put in valid_puts if check(put)]
-        if invalid_puts:
-            log.debug(
-                f"Hiding {len(invalid_puts)} puts due to min open interest filter."
+        response, fetched = self._get_chain(ticker, expiry_date, valid_strikes)
+        with metrics.span("parse_puts", ticker):
+            puts = self._parse_puts(
+                ticker, expiry_date, response, market_price, valid_strikes
             )
+        if fetched:
+            self._snapshot_chain(ticker, puts)
+        return puts
 
-        # filter based on min annualized return
-        check = (
-            lambda put: float(put["auxiliaryInfo"]["annualizedReturn"])
-            >= min_annualized_return
-            / 100  # GUI specifies percentage as 11 instead of .11
-        )
-        invalid_puts = [put for put in valid_puts if not check(put)]
-        valid_puts = [put for put in valid_puts if check(put)]
-        if invalid_puts:
-            log.debug(
-                f"Hiding {len(invalid_puts)} puts due to min annualized return filter."
+    def get_top_puts(
+        self,
+        ticker: str,
+        expiry_date: datetime.date,
+        market_price: float,
+        valid_strikes: typing.Set[int],
+        top_k: int,
+        **filters,
+    ) -> typing.Optional[Puts]:
+        """Like get_puts, but only the chain's best top_k puts that pass the
+        filters (see _rank_puts)."""
+        if not valid_strikes:
+            return self._empty_puts()
+
+        response, fetched = self._get_chain(ticker, expiry_date, valid_strikes)
+        with metrics.span("rank_puts", ticker):
+            return self._rank_puts(
+                ticker,
+                expiry_date,
+                response,
+                market_price,
+                valid_strikes,
+                top_k,
+                snapshot=fetched,
+                **filters,
             )
 
-        log.info(f"Found {len(valid_puts)} valid options for ticker {ticker}.")
+    def get_market_data(self, ticker: str) -> MarketData:
+        market_data = self.quote_cache.get(ticker)
+        if market_data is None:
+            # unlike in a bulk fetch, an error is raised to the caller
+            market_data = self._fetch_market_data([ticker]).get(ticker)
+            if market_data is None:
+                raise ValueError(f"No quote data returned for ticker '{ticker}'")
+            self.quote_cache.set(ticker, market_data)
+        return market_data
 
-        return valid_puts
+    def get_market_data_bulk(
+        self, tickers: typing.Iterable[str]
+    ) -> typing.Dict[str, MarketData]:
+        """Quotes of the tickers that could be fetched, see _get_market_data_bulk."""
+        return self._get_market_data_bulk(tickers)[0]
+
+    def _get_market_data_bulk(
+        self, tickers: typing.Iterable[str]
+    ) -> typing.Tuple[typing.Dict[str, MarketData], typing.List[str]]:
+        """Quotes of tickers, cached or fetched MAX_QUOTE_SYMBOLS at a time, and
+        the tickers of the requests that failed. A failed request is logged and
+        skipped, so the other tickers are still quoted."""
+        result = {}
+        missing = []
+        for ticker in dict.fromkeys(tickers):
+            market_data = self.quote_cache.get(ticker)
+            if market_data is None:
+                missing.append(ticker)
+            else:
+                result[ticker] = market_data
+
+        unquoted = []
+        for i in range(0, len(missing), MAX_QUOTE_SYMBOLS):
+            chunk = missing[i : i + MAX_QUOTE_SYMBOLS]
+            try:
+                fetched = self._fetch_market_data(chunk)
+            except Exception as ex:
+                self._skip_quote_chunk(chunk, ex)
+                unquoted.extend(chunk)
+                continue
+            for ticker, market_data in fetched.items():
+                self.quote_cache.set(ticker, market_data)
+                result[ticker] = market_data
+
+        return result, unquoted
 
     @retry(
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=0.1),
         reraise=True,
+        before_sleep=metrics.count_retry,
+        retry=retry_if_exception(_is_retryable),
     )
-    def get_market_data(self, ticker: str) -> MarketData:
-        all_data = self.market.get_quote([ticker], require_earnings_date=True)[
-            "QuoteResponse"
-        ]["QuoteData"]["All"]
-
-        market_price = round(float(all_data["lastTrade"]), 2)
-        high_52 = round(float(all_data["high52"]), 2)
-        low_52 = round(float(all_data["low52"]), 2)
-        range_52 = high_52 - low_52
-        percentile_52 = round((market_price - low_52) / range_52, 2)
-        return MarketData(
-            ticker=ticker,
-            company_name=str(all_data["companyName"]),
-            market_price=market_price,
-            high_52=high_52,
-            low_52=low_52,
-            percentile_52=percentile_52,
-            beta=float(all_data["beta"]),
-            next_earnings_date=str(all_data["nextEarningDate"]),
+    def _fetch_market_data(
+        self, tickers: typing.List[str]
+    ) -> typing.Dict[str, MarketData]:
+        response = self._request(
+            self.market.get_quote, tickers, require_earnings_date=True
         )
+        return self._parse_quotes(tickers, response)
 
+    @retry(
+        stop=stop_after_attempt(10),
+        wait=wait_exponential(multiplier=0.1),
+        reraise=True,
+        before_sleep=metrics.count_retry,
+        retry=retry_if_exception(_is_retryable),
+    )
     def get_expiry_dates(
         self,
         ticker: str,
         month_look_ahead: int = 3,
         include_next_earnings_date: bool = True,
     ):
-        dates = self.market.get_option_expire_date(underlier=ticker)[
-            "OptionExpireDateResponse"
-        ]["ExpirationDate"]
-
-        if any(isinstance(date, str) for date in dates):
-            log.error(f"Skipping ticker '{ticker}' due to bad expiry dates: {dates}")
-            return []
-
-        monthly_dates = [date for date in dates if date["expiryType"] == "MONTHLY"]
-        return [
-            datetime.date(
-                year=int(date["year"]), month=int(date["month"]), day=int(date["day"])
+        response = self.expiry_cache.get(ticker)
+        if response is None:
+            response = self._request(
+                self.market.get_option_expire_date, underlier=ticker
             )
-            for date in monthly_dates[
-                0 if include_next_earnings_date else 1 : month_look_ahead
-            ]
-        ]
-
-    def process_put_object(self, put: typing.Dict, contracts_to_buy: int):
-        put["belowMarketPct"] = round(
-            (float(put["marketPrice"]) - float(put["strikePrice"]))
-            / float(put["marketPrice"]),
-            3,
+            self._cache_expiry_dates(ticker, response)
+        return self._parse_expiry_dates(
+            ticker, response, month_look_ahead, include_next_earnings_date
         )
 
-        put["OptionGreeks"]["iv"] = round(float(put["OptionGreeks"]["iv"]), 2)
-
-        auxiliary_info = {}
-
-        contracts_to_buy = min(contracts_to_buy, int(put["volume"]))
-        auxiliary_info["contractsToBuy"] = contracts_to_buy
-
-        contract_price = sum([float(put["bid"]), float(put["ask"])]) / 2
-        num_underlying_shares = 100 * contracts_to_buy
-        revenue = contract_price * num_underlying_shares
-        auxiliary_info["revenue"] = round(revenue, 2)
-
-        tz = pytz.timezone("EST")
-        days_to_hold = put["expiryDate"] - tz.localize(datetime.datetime.now()).date()
-
-        annualize_factor = (365 / days_to_hold.days) if days_to_hold.days > 0 else 0
-        auxiliary_info["annualizedRevenue"] = int(revenue * annualize_factor)
-
-        # (revenue / (strike * 100)) * annualize factor (expressed as decimal)
-        auxiliary_info["annualizedReturn"] = round(
-            ((revenue / (float(put["strikePrice"]) * 100)) * annualize_factor), 4
-        )
+    def warm_expiry_dates(
+        self, tickers: typing.Optional[typing.Iterable[str]] = None
+    ) -> int:
+        """Fetch the expiry calendars that aren't cached yet for tickers (every
+        ticker in sectors.csv by default), so scans don't have to. Returns the
+        number fetched."""
+        if tickers is None:
+            tickers = get_sector_index().tickers
+        missing = [
+            ticker
+            for ticker in tickers
+            if self.expiry_cache.get(ticker) is None
+            and self.failed_tickers.get(ticker) is None
+        ]
 
-        auxiliary_info["notionalPrinciple"] = round(
-            float(put["strikePrice"]) * 100 * contracts_to_buy
-        )
+        def helper(ticker):
+            try:
+                self.get_expiry_dates(ticker)
+                return True
+            except Exception as ex:
+                log.error(f"Failed to warm expiry dates for '{ticker}': {ex}")
+                self._skip_ticker_on_error(ticker, "expiry_dates", ex)
+                return False
 
-        put["auxiliaryInfo"] = auxiliary_info
-        return put
+        with ThreadPool(self.thread_count) as thread_pool:
+            fetched = sum(thread_pool.map(helper, missing))
+        log.info(f"Warmed {fetched} of {len(missing)} uncached expiry calendars.")
+        return fetched
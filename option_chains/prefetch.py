@@ -0,0 +1,184 @@
+import collections
+import datetime
+import fcntl
+import logging
+import threading
+import time
+import typing
+from dataclasses import dataclass
+
+import pandas as pd
+import pytz
+
+from option_chains.cache import Cache, TTLCache
+from option_chains.options_manager import RequestBudget
+
+log = logging.getLogger(__name__)
+DEFAULT_INTERVAL = 300  # seconds
+DEFAULT_REQUEST_BUDGET = 2000  # api requests per hour
+MARKET_TIMEZONE = pytz.timezone("US/Eastern")
+MARKET_OPEN = datetime.time(9, 30)
+MARKET_CLOSE = datetime.time(16, 0)
+
+
+def is_market_open(now: typing.Optional[datetime.datetime] = None) -> bool:
+    """Regular trading hours on weekdays. Exchange holidays are not accounted for."""
+    now = now or datetime.datetime.now(tz=MARKET_TIMEZONE)
+    now = now.astimezone(MARKET_TIMEZONE)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+@dataclass
+class Snapshot:
+    df: pd.DataFrame
+    taken_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.taken_at
+
+
+class PrefetchScheduler:
+    """Background thread that re-runs a fixed set of scans on an interval.
+
+    Each scan's labelled frame is kept as a snapshot keyed by its scan
+    parameters, so requests for the same scan can be answered without waiting on
+    the api. Scans only run during market hours (unless ``market_hours_only`` is
+    off) and stop for the hour once ``request_budget`` api requests have been
+    spent on them, partway through a scan if need be. Only the prefetch scans'
+    own requests are counted.
+
+    With a ``lock_path``, only the process holding an exclusive lock on that file
+    runs the scans (e.g. one of the gunicorn workers), so the budget is spent
+    once per host. The others only read snapshots, so ``snapshots`` should then
+    be a cache the processes share.
+    """
+
+    def __init__(
+        self,
+        get_manager: typing.Callable,
+        scans: typing.List[typing.Dict],
+        interval: float = DEFAULT_INTERVAL,
+        request_budget: int = DEFAULT_REQUEST_BUDGET,
+        market_hours_only: bool = True,
+        max_age: typing.Optional[float] = None,
+        snapshots: typing.Optional[Cache] = None,
+        lock_path: typing.Optional[str] = None,
+    ):
+        # returns None until a manager can be made (e.g. before anyone logs in)
+        self.get_manager = get_manager
+        self.scans = scans
+        self.interval = interval
+        self.request_budget = request_budget
+        self.market_hours_only = market_hours_only
+        self.max_age = 2 * interval if max_age is None else max_age
+
+        self.snapshots = (
+            TTLCache(ttl=self.max_age, maxsize=max(len(scans), 1))
+            if snapshots is None
+            else snapshots
+        )
+        self.lock_path = lock_path
+        self._lock_file = None
+        self._spent = collections.deque()  # (time, requests) per scan
+        self._stop = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+    @staticmethod
+    def _key(scan_args: typing.Dict) -> typing.Tuple:
+        return tuple(sorted(scan_args.items()))
+
+    def get_snapshot(self, scan_args: typing.Dict) -> typing.Optional[Snapshot]:
+        """Most recent snapshot for these scan parameters, if it isn't too old."""
+        snapshot = self.snapshots.get(self._key(scan_args))
+        if snapshot is None or snapshot.age > self.max_age:
+            return None
+        return snapshot
+
+    def requests_spent(self) -> int:
+        """Api requests made by prefetch scans in the last hour."""
+        hour_ago = time.time() - 3600
+        while self._spent and self._spent[0][0] < hour_ago:
+            self._spent.popleft()
+        return sum(requests for _, requests in self._spent)
+
+    def _acquire_lock(self) -> bool:
+        """Whether this process runs the scans. Once taken, the lock is held until
+        the process exits or the scheduler is stopped."""
+        if self.lock_path is None or self._lock_file is not None:
+            return True
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        log.info("Running prefetch scans in this process.")
+        return True
+
+    def run_once(self):
+        if self.market_hours_only and not is_market_open():
+            log.debug("Market is closed, skipping prefetch.")
+            return
+        if not self._acquire_lock():
+            log.debug("Another process runs the prefetch scans.")
+            return
+
+        manager = self.get_manager()
+        if manager is None:
+            log.debug("No manager available yet, skipping prefetch.")
+            return
+
+        for scan_args in self.scans:
+            if self._stop.is_set():
+                return
+            budget = RequestBudget(self.request_budget - self.requests_spent())
+            if not budget.remaining:
+                log.warning(
+                    f"Prefetch request budget of {self.request_budget}/hour spent, "
+                    "skipping remaining scans."
+                )
+                return
+
+            start = time.time()
+            try:
+                df = manager.get_all_options_frame(**scan_args, request_budget=budget)
+            except Exception as ex:
+                log.error(f"Prefetch of {scan_args} failed: {ex}")
+                continue
+            finally:
+                self._spent.append((time.time(), budget.spent))
+
+            self.snapshots.set(
+                self._key(scan_args), Snapshot(df=df, taken_at=start), ttl=self.max_age
+            )
+            log.info(
+                f"Prefetched {len(df)} puts for {scan_args.get('sector')} in "
+                f"{time.time() - start:.1f}s."
+            )
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.run_once()
+            except Exception as ex:
+                log.error(f"Prefetch failed: {ex}")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="prefetch", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,143 @@
+"""Vectorized Black-Scholes pricing of European puts.
+
+Every function takes arrays (or scalars that broadcast against them), so a
+whole chain, or every chain of a scan, is priced in a handful of NumPy calls.
+No dividends are modelled, and E*Trade's American puts are treated as European.
+"""
+
+import typing
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.special import ndtr
+
+RISK_FREE_RATE = 0.04  # annual, continuously compounded
+DAYS_PER_YEAR = 365  # calendar days, as annualized returns are
+MIN_IV = 1e-4
+MAX_IV = 5.0
+IV_TOLERANCE = 1e-6  # dollars per share
+IV_MAX_ITERATIONS = 64
+
+ArrayLike = typing.Union[float, np.ndarray]
+
+
+@dataclass(frozen=True)
+class WhatIf:
+    """A hypothetical market to reprice puts in."""
+
+    price_change: float = 0.0  # move of the underlying, e.g. -0.05 for 5% lower
+    days_forward: int = 0  # days from now the puts would be sold
+
+
+def _norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+
+def _d1_d2(spot, strike, years, iv, rate):
+    vol_time = iv * np.sqrt(years)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * iv * iv) * years) / vol_time
+    return d1, d1 - vol_time
+
+
+def put_price(
+    spot: ArrayLike,
+    strike: ArrayLike,
+    years: ArrayLike,
+    iv: ArrayLike,
+    rate: float = RISK_FREE_RATE,
+) -> np.ndarray:
+    """Put prices. Expired puts (``years <= 0``) are worth their intrinsic value."""
+    spot, strike, years, iv = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (spot, strike, years, iv))
+    )
+    live = years > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1, d2 = _d1_d2(spot, strike, years, iv, rate)
+        price = strike * np.exp(-rate * years) * ndtr(-d2) - spot * ndtr(-d1)
+    return np.where(live, price, np.maximum(strike - spot, 0.0))
+
+
+def put_greeks(
+    spot: ArrayLike,
+    strike: ArrayLike,
+    years: ArrayLike,
+    iv: ArrayLike,
+    rate: float = RISK_FREE_RATE,
+) -> typing.Dict[str, np.ndarray]:
+    """Delta, gamma, vega (per 1.00 of volatility) and theta (per year) of puts.
+    NaN for expired puts."""
+    spot, strike, years, iv = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (spot, strike, years, iv))
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        years = np.where(years > 0, years, np.nan)
+        d1, d2 = _d1_d2(spot, strike, years, iv, rate)
+        pdf = _norm_pdf(d1)
+        sqrt_years = np.sqrt(years)
+        return {
+            "delta": ndtr(d1) - 1,
+            "gamma": pdf / (spot * iv * sqrt_years),
+            "vega": spot * pdf * sqrt_years,
+            "theta": -spot * pdf * iv / (2 * sqrt_years)
+            + rate * strike * np.exp(-rate * years) * ndtr(-d2),
+        }
+
+
+def implied_volatility(
+    price: ArrayLike,
+    spot: ArrayLike,
+    strike: ArrayLike,
+    years: ArrayLike,
+    rate: float = RISK_FREE_RATE,
+) -> np.ndarray:
+    """Volatilities that reproduce put prices, solved for all puts at once.
+
+    Each put takes Newton steps inside a bracket that shrinks every iteration,
+    and bisects whenever a step would leave it (e.g. where vega vanishes), so
+    every put converges. NaN where no volatility in [MIN_IV, MAX_IV] gives the
+    price, including expired puts and prices outside the no-arbitrage bounds.
+    """
+    arrays = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (price, spot, strike, years))
+    )
+    shape = arrays[0].shape
+    price, spot, strike, years = (x.ravel() for x in arrays)
+    iv = np.full(price.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        solvable = (
+            (years > 0)
+            & (price > put_price(spot, strike, years, MIN_IV, rate))
+            & (price < put_price(spot, strike, years, MAX_IV, rate))
+        )
+    active = np.flatnonzero(solvable)
+    price, spot, strike, years = (x[active] for x in (price, spot, strike, years))
+
+    low = np.full(active.shape, MIN_IV)
+    high = np.full(active.shape, MAX_IV)
+    # Brenner-Subrahmanyam estimate, which is close for near the money puts
+    guess = np.clip(np.sqrt(2 * np.pi / years) * price / spot, MIN_IV, MAX_IV)
+    for _ in range(IV_MAX_ITERATIONS):
+        if not active.size:
+            break
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            d1, d2 = _d1_d2(spot, strike, years, guess, rate)
+            error = strike * np.exp(-rate * years) * ndtr(-d2) - spot * ndtr(-d1)
+            error -= price
+            vega = spot * _norm_pdf(d1) * np.sqrt(years)
+            step = guess - error / vega
+
+        done = np.abs(error) < IV_TOLERANCE
+        iv[active[done]] = guess[done]
+        # put prices rise with volatility, so the error says which side the root is
+        high = np.where(error > 0, guess, high)
+        low = np.where(error < 0, guess, low)
+        bisect = ~((step > low) & (step < high))
+        guess = np.where(bisect, (low + high) / 2, step)
+
+        keep = ~done
+        active, price, spot, strike, years, low, high, guess = (
+            x[keep] for x in (active, price, spot, strike, years, low, high, guess)
+        )
+    # the few that haven't met the tolerance keep their last estimate
+    iv[active] = guess
+    return iv.reshape(shape)
@@ -0,0 +1,68 @@
+import typing
+
+import numpy as np
+import pandas as pd
+
+
+class Puts:
+    """Puts as a struct of arrays: one NumPy array per field, all the same length.
+
+    A chain is parsed into one of these once, with numeric fields converted to
+    native types, and the same arrays are then filtered, extended with computed
+    fields and handed to a DataFrame for display, rather than keeping a dict per
+    put. Operations return new Puts that share the unchanged arrays.
+    """
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: typing.Dict[str, np.ndarray]):
+        self.fields = fields
+
+    @classmethod
+    def parse(
+        cls, puts: typing.List[typing.Dict], field_types: typing.Dict[str, type]
+    ) -> "Puts":
+        """Parse api put dicts, e.g. ``{"bid": "1.25", ...}``, column by column.
+
+        Missing float fields become NaN, while a missing int field is an error.
+        """
+        fields = {}
+        for key, field_type in field_types.items():
+            values = np.empty(len(puts), dtype=object)
+            values[:] = [put.get(key) for put in puts]
+            fields[key] = values if field_type is object else values.astype(field_type)
+        return cls(fields)
+
+    @classmethod
+    def concat(cls, puts: typing.Sequence["Puts"]) -> "Puts":
+        if len(puts) == 1:
+            return puts[0]
+        return cls(
+            {
+                key: np.concatenate([chain.fields[key] for chain in puts])
+                for key in puts[0].fields
+            }
+        )
+
+    def __len__(self):
+        return len(next(iter(self.fields.values()), ()))
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.fields[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.fields
+
+    def assign(self, **fields: np.ndarray) -> "Puts":
+        """Add or replace fields. Replaced fields keep their position."""
+        return Puts({**self.fields, **fields})
+
+    def drop(self, *keys: str) -> "Puts":
+        return Puts({key: self.fields[key] for key in self.fields if key not in keys})
+
+    def take(self, index: np.ndarray) -> "Puts":
+        """The puts at index, a boolean mask or an array of positions."""
+        return Puts({key: values[index] for key, values in self.fields.items()})
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.fields, copy=False)
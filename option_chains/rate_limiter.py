@@ -0,0 +1,162 @@
+import asyncio
+import contextlib
+import threading
+import time
+import typing
+
+DEFAULT_RATE = 10.0  # requests per second
+DEFAULT_CONCURRENCY = 6
+POLL_INTERVAL = 0.01  # seconds
+# how a request ended, see RateLimiter.release
+SUCCESS = "success"
+THROTTLED = "throttled"
+FAILED = "failed"
+
+
+def is_throttle_error(ex: BaseException) -> bool:
+    """True for 429 and 5xx responses from either ``requests`` or ``aiohttp``."""
+    status = getattr(ex, "status", None)  # aiohttp.ClientResponseError
+    response = getattr(ex, "response", None)  # requests.exceptions.HTTPError
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+class RateLimiter:
+    """Token bucket rate limiter with AIMD adaptive rate and concurrency.
+
+    Every successful request additively raises the request rate and the
+    concurrency limit; a throttled request (429/5xx) halves both. Decreases are
+    applied at most once per ``backoff_interval`` so a burst of throttled
+    responses from requests that were already in flight only counts once. Other
+    failures (e.g. auth errors or a dropped connection) leave both unchanged.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        min_rate: float = 1.0,
+        max_rate: float = 50.0,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        min_concurrency: int = 1,
+        max_concurrency: int = 32,
+        backoff_interval: float = 1.0,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.backoff_interval = backoff_interval
+
+        self.rate = rate
+        self.in_flight = 0
+        self.requests = 0
+        self.throttle_events = 0
+
+        self._concurrency = float(concurrency)
+        self._tokens = 1.0
+        self._updated_at = time.monotonic()
+        self._backed_off_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def concurrency(self) -> int:
+        return int(self._concurrency)
+
+    def _try_acquire(self) -> float:
+        """Take a token and a concurrency slot, or return how long to wait for one."""
+        with self._lock:
+            now = time.monotonic()
+            # allow a burst of up to one second's worth of requests
+            self._tokens = min(
+                max(self.rate, 1.0),
+                self._tokens + (now - self._updated_at) * self.rate,
+            )
+            self._updated_at = now
+
+            if self.in_flight >= self.concurrency:
+                return POLL_INTERVAL
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+
+            self._tokens -= 1
+            self.in_flight += 1
+            self.requests += 1
+            return 0
+
+    def acquire(self):
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, outcome: str = SUCCESS):
+        """Free the request's slot, adjusting the limits by its outcome: SUCCESS,
+        THROTTLED or FAILED."""
+        assert outcome in (SUCCESS, THROTTLED, FAILED), f"unknown outcome {outcome}"
+        with self._lock:
+            self.in_flight -= 1
+            if outcome == THROTTLED:
+                self.throttle_events += 1
+                now = time.monotonic()
+                if now - self._backed_off_at >= self.backoff_interval:
+                    self._backed_off_at = now
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self._concurrency = max(self.min_concurrency, self._concurrency / 2)
+            elif outcome == SUCCESS:
+                # roughly +1 request/second per second and +1 slot per window of
+                # successes
+                self.rate = min(self.max_rate, self.rate + 1 / self.rate)
+                self._concurrency = min(
+                    self.max_concurrency, self._concurrency + 1 / self._concurrency
+                )
+
+    @contextlib.contextmanager
+    def limit(self):
+        self.acquire()
+        # a request cancelled before it ends counts as failed
+        outcome = FAILED
+        try:
+            yield
+            outcome = SUCCESS
+        except Exception as ex:
+            outcome = THROTTLED if is_throttle_error(ex) else FAILED
+            raise
+        finally:
+            self.release(outcome)
+
+    @contextlib.asynccontextmanager
+    async def limit_async(self):
+        await self.acquire_async()
+        # a request cancelled before it ends counts as failed
+        outcome = FAILED
+        try:
+            yield
+            outcome = SUCCESS
+        except Exception as ex:
+            outcome = THROTTLED if is_throttle_error(ex) else FAILED
+            raise
+        finally:
+            self.release(outcome)
+
+    def metrics(self) -> typing.Dict[str, float]:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 2),
+                "concurrency": self.concurrency,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "throttle_events": self.throttle_events,
+            }
+
+
+# shared by every manager so all scans in a process draw from one budget
+RATE_LIMITER = RateLimiter()
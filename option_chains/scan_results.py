@@ -0,0 +1,149 @@
+import datetime
+import operator
+import re
+import time
+import typing
+
+import pandas as pd
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+FILTER_PATTERN = re.compile(r"^(<=|>=|<|>|=)?\s*(.+)$")
+FILTER_OPERATORS = {
+    "<=": operator.le,
+    ">=": operator.ge,
+    "<": operator.lt,
+    ">": operator.gt,
+    "=": operator.eq,
+    None: operator.eq,
+}
+
+
+def _is_date_column(column: pd.Series) -> bool:
+    first = column.first_valid_index()
+    return first is not None and isinstance(column[first], datetime.date)
+
+
+def _filter_mask(column: pd.Series, expr: str) -> pd.Series:
+    """Mask for one column filter.
+
+    Numeric and date columns accept ``<=x``, ``>=x``, ``<x``, ``>x``, ``=x`` (or a
+    bare ``x``) and ``low..high`` ranges, with dates written as ``YYYY-MM-DD``.
+    Any other column is matched as a case-insensitive substring.
+    """
+    expr = expr.strip()
+    if pd.api.types.is_numeric_dtype(column):
+        convert = float
+    elif _is_date_column(column):
+        convert = datetime.date.fromisoformat
+    else:
+        return column.astype(str).str.contains(expr, case=False, regex=False)
+
+    try:
+        if ".." in expr:
+            low, high = expr.split("..", 1)
+            return column.between(convert(low.strip()), convert(high.strip()))
+        op, value = FILTER_PATTERN.match(expr).groups()
+        return FILTER_OPERATORS[op](column, convert(value.strip()))
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError(f"Invalid filter '{expr}' for column '{column.name}'")
+
+
+class ScanResults:
+    """A finished scan held as typed columns, to be sorted, filtered and paged.
+
+    The frame is never modified, so one result set can serve any number of
+    queries while it stays cached.
+    """
+
+    def __init__(self, df: pd.DataFrame, created_at: typing.Optional[float] = None):
+        self.df = df
+        self.created_at = time.time() if created_at is None else created_at
+        # tickers a scan with a time budget didn't get to
+        self.unscanned: typing.List[str] = df.attrs.get("unscanned", [])
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def columns(self) -> typing.List[str]:
+        return self.df.columns.to_list()
+
+    def _check_column(self, column: str):
+        if column not in self.df.columns:
+            raise ValueError(f"Unknown column '{column}'")
+
+    def query(
+        self,
+        sort: typing.Sequence[typing.Tuple[str, bool]] = (),
+        filters: typing.Optional[typing.Dict[str, str]] = None,
+        search: typing.Optional[str] = None,
+        offset: int = 0,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> typing.Tuple[int, pd.DataFrame]:
+        """Return the number of matching rows and the requested page of them.
+
+        ``sort`` is a list of (column, ascending) pairs, ``filters`` maps column
+        names to filter expressions and ``search`` is a substring matched against
+        every text column.
+        """
+        df = self.df
+        if df.empty:
+            return 0, df
+
+        mask = pd.Series(True, index=df.index)
+        for column, expr in (filters or {}).items():
+            self._check_column(column)
+            if expr:
+                mask &= _filter_mask(df[column], expr)
+
+        if search:
+            text_columns = [
+                column
+                for column in df.columns
+                if not pd.api.types.is_numeric_dtype(df[column])
+                and not _is_date_column(df[column])
+            ]
+            search_mask = pd.Series(False, index=df.index)
+            for column in text_columns:
+                search_mask |= (
+                    df[column].astype(str).str.contains(search, case=False, regex=False)
+                )
+            mask &= search_mask
+
+        if not mask.all():
+            df = df[mask]
+
+        if sort:
+            for column, _ in sort:
+                self._check_column(column)
+            # stable sort so ties keep scan order across pages
+            df = df.sort_values(
+                [column for column, _ in sort],
+                ascending=[ascending for _, ascending in sort],
+                kind="mergesort",
+            )
+
+        offset = max(offset, 0)
+        limit = min(max(limit, 0), MAX_PAGE_SIZE)
+        return len(df), df.iloc[offset : offset + limit]
+
+
+def parse_sort(value: typing.Optional[str]) -> typing.List[typing.Tuple[str, bool]]:
+    """Parse ``"A%,-Stk"`` into ``[("A%", True), ("Stk", False)]``."""
+    sort = []
+    for column in (value or "").split(","):
+        column = column.strip()
+        if column:
+            sort.append((column.lstrip("-"), not column.startswith("-")))
+    return sort
+
+
+def page_to_json(page: pd.DataFrame) -> str:
+    """Rows of a page, index first, as a JSON array of arrays with ISO dates."""
+    page = page.reset_index()
+    for column in page.columns:
+        if _is_date_column(page[column]):
+            page[column] = page[column].map(lambda dt: dt.isoformat())
+    return page.to_json(orient="values")
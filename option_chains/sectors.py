@@ -0,0 +1,99 @@
+import csv
+import pathlib
+import threading
+import typing
+from collections import defaultdict
+from dataclasses import dataclass
+
+SECTORS_PATH = pathlib.Path(__file__).parent / "data" / "sectors.csv"
+
+
+@dataclass(frozen=True)
+class SectorIndex:
+    tickers: typing.List[str]
+    ticker_to_sector: typing.Dict[str, str]
+    ticker_to_sub_sector: typing.Dict[str, str]
+    sector_to_tickers: typing.Dict[str, typing.List[str]]
+    sub_sector_to_tickers: typing.Dict[str, typing.List[str]]
+    sector_to_sub_sector_to_tickers: typing.Dict[
+        str, typing.Dict[str, typing.List[str]]
+    ]
+    blue_chips: typing.FrozenSet[str]
+    all_sectors: typing.List[str]
+    all_sub_sectors: typing.List[str]
+
+    @classmethod
+    def from_csv(cls, path: pathlib.Path) -> "SectorIndex":
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+
+        tickers = list(dict.fromkeys(row["Ticker"] for row in rows))
+        sector_to_tickers = defaultdict(list)
+        sub_sector_to_tickers = defaultdict(list)
+        sector_to_sub_sector_to_tickers = defaultdict(lambda: defaultdict(list))
+        for row in rows:
+            ticker, sector, sub_sector = row["Ticker"], row["Sector"], row["Sub-Sector"]
+            sector_to_tickers[sector].append(ticker)
+            sub_sector_to_tickers[sub_sector].append(ticker)
+            sector_to_sub_sector_to_tickers[sector][sub_sector].append(ticker)
+
+        return cls(
+            tickers=tickers,
+            ticker_to_sector={row["Ticker"]: row["Sector"] for row in rows},
+            ticker_to_sub_sector={row["Ticker"]: row["Sub-Sector"] for row in rows},
+            sector_to_tickers=dict(sector_to_tickers),
+            sub_sector_to_tickers=dict(sub_sector_to_tickers),
+            sector_to_sub_sector_to_tickers={
+                sector: dict(sub_sectors)
+                for sector, sub_sectors in sector_to_sub_sector_to_tickers.items()
+            },
+            blue_chips=frozenset(
+                row["Ticker"] for row in rows if row["Blue Chip"] == "Yes"
+            ),
+            # unique sectors/sub-sectors for use in dropdowns
+            all_sectors=["All", *sorted(sector_to_tickers)],
+            all_sub_sectors=["All", *sorted(sub_sector_to_tickers)],
+        )
+
+    def get_tickers(
+        self,
+        sector: typing.Optional[str] = None,
+        sub_sector: typing.Optional[str] = None,
+        blue_chip_only: bool = False,
+    ) -> typing.List[str]:
+        # a falsy sector or sub-sector means don't filter on it
+        if sector and sub_sector:
+            tickers = self.sector_to_sub_sector_to_tickers.get(sector, {}).get(
+                sub_sector, []
+            )
+        elif sector:
+            tickers = self.sector_to_tickers.get(sector, [])
+        elif sub_sector:
+            tickers = self.sub_sector_to_tickers.get(sub_sector, [])
+        else:
+            tickers = self.tickers
+
+        tickers = list(dict.fromkeys(tickers))
+        if blue_chip_only:
+            tickers = [ticker for ticker in tickers if ticker in self.blue_chips]
+        return tickers
+
+
+_index: typing.Optional[SectorIndex] = None
+_index_mtime: typing.Optional[float] = None
+_index_lock = threading.Lock()
+
+
+def get_sector_index() -> SectorIndex:
+    """Return the sector index, reloading it only when sectors.csv has changed."""
+    global _index, _index_mtime
+
+    mtime = SECTORS_PATH.stat().st_mtime
+    with _index_lock:
+        if _index is None or _index_mtime != mtime:
+            _index, _index_mtime = SectorIndex.from_csv(SECTORS_PATH), mtime
+        return _index
+
+
+# load once at import so the first request doesn't pay for it
+get_sector_index()
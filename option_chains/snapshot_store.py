@@ -0,0 +1,253 @@
+import atexit
+import datetime
+import logging
+import os
+import pathlib
+import queue
+import threading
+import time
+import typing
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs
+import pyarrow.parquet as pq
+import pytz
+
+log = logging.getLogger(__name__)
+MARKET_TIMEZONE = pytz.timezone("US/Eastern")
+FLUSH_INTERVAL = 2.0  # seconds appends are gathered for before being written
+ROW_GROUP_SIZE = 8192  # rows, so filters on ticker and expiry skip most of a file
+
+GREEKS_TYPE = pa.struct(
+    [
+        ("rho", pa.float64()),
+        ("vega", pa.float64()),
+        ("theta", pa.float64()),
+        ("delta", pa.float64()),
+        ("gamma", pa.float64()),
+        ("iv", pa.float64()),
+        ("currentValue", pa.bool_()),
+    ]
+)
+
+# PUT_INFO_TO_INCLUDE plus the fields added while scanning and filtering
+SNAPSHOT_SCHEMA = pa.schema(
+    [
+        ("scannedAt", pa.timestamp("us", tz="UTC")),
+        ("bid", pa.float64()),
+        ("ask", pa.float64()),
+        ("lastPrice", pa.float64()),
+        ("volume", pa.int64()),
+        ("openInterest", pa.int64()),
+        ("OptionGreeks", GREEKS_TYPE),
+        ("strikePrice", pa.float64()),
+        ("symbol", pa.string()),
+        ("optionType", pa.string()),
+        ("netChange", pa.float64()),
+        ("iv", pa.float64()),
+        ("expiryDate", pa.date32()),
+        ("marketPrice", pa.float64()),
+        ("belowMarketPct", pa.float64()),
+        ("contractsToBuy", pa.int64()),
+        ("revenue", pa.float64()),
+        ("annualizedRevenue", pa.int64()),
+        ("annualizedReturn", pa.float64()),
+        ("notionalPrinciple", pa.int64()),
+    ]
+)
+
+# directories are laid out as date=YYYY-MM-DD, and the rows of each file are
+# sorted by ticker and expiry
+PARTITION_SCHEMA = pa.schema([("date", pa.date32())])
+SORT_KEYS = [("symbol", "ascending"), ("expiryDate", "ascending")]
+
+
+def _parse_greeks(greeks: typing.Optional[typing.Dict]) -> typing.Optional[typing.Dict]:
+    if not greeks:
+        return None
+    parsed = {}
+    for field in GREEKS_TYPE:
+        value = greeks.get(field.name)
+        if value is None:
+            parsed[field.name] = None
+        elif field.name == "currentValue":
+            parsed[field.name] = str(value).lower() == "true"
+        else:
+            parsed[field.name] = float(value)
+    return parsed
+
+
+def _to_table(puts: pd.DataFrame, scanned_at: datetime.datetime) -> pa.Table:
+    """Convert processed puts, with typed columns and OptionGreeks as returned
+    by the api, to the snapshot schema."""
+    columns = {"scannedAt": pa.array([scanned_at] * len(puts), SNAPSHOT_SCHEMA[0].type)}
+    for field in SNAPSHOT_SCHEMA:
+        if field.name == "scannedAt":
+            continue
+        values = puts[field.name] if field.name in puts else [None] * len(puts)
+        if field.name == "OptionGreeks":
+            values = [_parse_greeks(greeks) for greeks in values]
+        elif field.name == "expiryDate":
+            values = list(values)
+        elif pa.types.is_floating(field.type) or pa.types.is_integer(field.type):
+            values = pd.to_numeric(pd.Series(values), errors="coerce")
+            values = values.where(values.notna(), None).to_list()
+        else:
+            values = [None if value is None else str(value) for value in values]
+        columns[field.name] = pa.array(values, type=field.type)
+    return pa.table(columns, schema=SNAPSHOT_SCHEMA)
+
+
+class SnapshotStore:
+    """Append-only Parquet store of scanned puts, partitioned by scan date, with
+    rows sorted by ticker and expiry.
+
+    Appends are queued and written by a background thread, which gathers
+    everything appended within FLUSH_INTERVAL into one file per scan date, so
+    scans don't wait on disk and a scan makes a handful of files rather than one
+    per chain. Files are never modified once written, so readers can scan the
+    store while scans are being written. Reads memory-map the files.
+    """
+
+    def __init__(
+        self,
+        root: typing.Union[str, pathlib.Path],
+        flush_interval: float = FLUSH_INTERVAL,
+    ):
+        self.root = pathlib.Path(root)
+        self.flush_interval = flush_interval
+        self.filesystem = pyarrow.fs.LocalFileSystem(use_mmap=True)
+
+        # (puts, scanned_at) pairs, and None to write what was gathered so far
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: typing.Optional[threading.Thread] = None
+        self._writer_pid: typing.Optional[int] = None
+        self._lock = threading.Lock()
+
+    def append(
+        self,
+        puts: pd.DataFrame,
+        scanned_at: typing.Optional[datetime.datetime] = None,
+    ):
+        """Queue processed puts (the output of process_puts) to be written, and
+        return without waiting for them to be."""
+        if puts.empty:
+            return
+        self._start_writer()
+        self._queue.put((puts, scanned_at or datetime.datetime.now(tz=pytz.utc)))
+
+    def flush(self):
+        """Write every put appended so far now, and wait until it is written."""
+        if self._writer is not None and self._writer_pid == os.getpid():
+            self._queue.put(None)  # ends the batch being gathered
+            self._queue.join()
+
+    def _start_writer(self):
+        with self._lock:
+            # a forked worker doesn't inherit the parent's writer thread
+            if self._writer is not None and self._writer_pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(
+                target=self._write_forever, name="snapshot-writer", daemon=True
+            )
+            self._writer_pid = os.getpid()
+            self._writer.start()
+            atexit.register(self.flush)
+
+    def _write_forever(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while items[-1] is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            batch = [item for item in items if item is not None]
+            try:
+                if batch:
+                    self.write(batch)
+            except Exception as ex:
+                rows = sum(len(puts) for puts, _ in batch)
+                log.error(f"Failed to write {rows} puts to the snapshot store: {ex}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def write(
+        self, batch: typing.List[typing.Tuple[pd.DataFrame, datetime.datetime]]
+    ) -> int:
+        """Write (puts, scanned_at) pairs now, as one file per scan date, and
+        return the number of files written."""
+        tables_by_date = {}
+        for puts, scanned_at in batch:
+            date = scanned_at.astimezone(MARKET_TIMEZONE).date()
+            tables_by_date.setdefault(date, []).append(_to_table(puts, scanned_at))
+
+        for date, tables in tables_by_date.items():
+            table = pa.concat_tables(tables)
+            table = table.take(pc.sort_indices(table, sort_keys=SORT_KEYS))
+            directory = self.root / f"date={date.isoformat()}"
+            directory.mkdir(parents=True, exist_ok=True)
+
+            # unique per write so concurrent writers never collide, and written
+            # under a temporary name so readers never see a partial file
+            name = f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+            tmp_path = directory / f".{name}.tmp"
+            pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE)
+            os.replace(tmp_path, directory / name)
+            log.debug(f"Wrote {len(table)} puts to the {date} snapshots.")
+        return len(tables_by_date)
+
+    def dataset(self) -> ds.Dataset:
+        """The whole store as a pyarrow dataset, with a date partition column,
+        for columnar scans."""
+        return ds.dataset(
+            str(self.root),
+            schema=pa.unify_schemas([SNAPSHOT_SCHEMA, PARTITION_SCHEMA]),
+            format="parquet",
+            partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+            filesystem=self.filesystem,
+            # skip the temporary files of writes in progress
+            ignore_prefixes=["."],
+        )
+
+    def load(
+        self,
+        start_date: typing.Optional[datetime.date] = None,
+        end_date: typing.Optional[datetime.date] = None,
+        tickers: typing.Optional[typing.Iterable[str]] = None,
+        columns: typing.Optional[typing.List[str]] = None,
+    ) -> pd.DataFrame:
+        """Puts scanned between start_date and end_date (inclusive) for tickers.
+
+        Filters on the date prune whole directories, and filters on tickers skip
+        the row groups whose statistics rule them out, so little else is read.
+        Puts still queued by append aren't included until they are written.
+        """
+        if not self.root.exists():
+            return pd.DataFrame(columns=columns or SNAPSHOT_SCHEMA.names)
+
+        expression = None
+
+        def add(condition):
+            nonlocal expression
+            expression = condition if expression is None else expression & condition
+
+        if start_date is not None:
+            add(ds.field("date") >= start_date)
+        if end_date is not None:
+            add(ds.field("date") <= end_date)
+        if tickers is not None:
+            add(ds.field("symbol").isin(list(tickers)))
+
+        return self.dataset().to_table(columns=columns, filter=expression).to_pandas()
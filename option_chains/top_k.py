@@ -0,0 +1,38 @@
+import heapq
+import itertools
+import typing
+
+
+class TopK:
+    """Keep the ``k`` items with the largest keys out of any number pushed.
+
+    A min-heap of at most ``k`` entries, so memory stays O(k) however many items
+    are pushed, and each push is O(log k). Not thread-safe.
+    """
+
+    def __init__(self, k: int):
+        assert k > 0, "k should be a positive number of items"
+        self.k = k
+        self.pushed = 0
+        self._heap: typing.List[typing.Tuple[typing.Any, int, typing.Any]] = []
+        # breaks ties between equal keys, so items themselves are never compared
+        self._counter = itertools.count()
+
+    def push(self, key: typing.Any, item: typing.Any):
+        self.push_with(key, lambda: item)
+
+    def push_with(self, key: typing.Any, make_item: typing.Callable[[], typing.Any]):
+        """Like push, but the item is only made if it's kept, e.g. to copy it out
+        of a larger object that the heap shouldn't keep alive."""
+        self.pushed += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, (key, next(self._counter), make_item()))
+        elif key > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (key, next(self._counter), make_item()))
+
+    def items(self) -> typing.List[typing.Any]:
+        """Kept items, largest key first."""
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
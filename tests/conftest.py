@@ -0,0 +1,101 @@
+import datetime
+import random
+
+import pytest
+
+from option_chains.cache import TTLCache
+from option_chains.circuit_breaker import CircuitBreaker
+from option_chains.options_manager import OptionsManager
+from option_chains.rate_limiter import RateLimiter
+from option_chains.single_flight import SingleFlight
+
+
+class FakeMarket:
+    """Deterministic stand-in for ``pyetrade.ETradeMarket``, returning parsed
+    responses shaped like E*Trade's."""
+
+    def __init__(self):
+        self.calls = {"quote": 0, "expiry": 0, "chain": 0}
+
+    @staticmethod
+    def quote(symbol: str) -> dict:
+        rng = random.Random(symbol)
+        low = rng.uniform(10, 200)
+        high = low * rng.uniform(1.2, 2)
+        return {
+            "All": {
+                "lastTrade": f"{rng.uniform(low, high):.2f}",
+                "high52": f"{high:.2f}",
+                "low52": f"{low:.2f}",
+                "companyName": f"{symbol} Corp",
+                "beta": "1.1",
+                "nextEarningDate": "11/02/2026",
+            },
+            "Product": {"symbol": symbol},
+        }
+
+    def get_quote(self, symbols, **kwargs):
+        self.calls["quote"] += 1
+        quotes = [self.quote(symbol) for symbol in symbols]
+        return {
+            "QuoteResponse": {"QuoteData": quotes[0] if len(quotes) == 1 else quotes}
+        }
+
+    def get_option_expire_date(self, underlier, **kwargs):
+        self.calls["expiry"] += 1
+        today = datetime.date.today()
+        dates = []
+        for month in range(1, 5):
+            date = today + datetime.timedelta(days=30 * month)
+            dates.append(
+                {
+                    "year": str(date.year),
+                    "month": str(date.month),
+                    "day": "15",
+                    "expiryType": "MONTHLY",
+                }
+            )
+        return {"OptionExpireDateResponse": {"ExpirationDate": dates}}
+
+    def get_option_chains(self, underlier, expiry_date, **kwargs):
+        self.calls["chain"] += 1
+        last = float(self.quote(underlier)["All"]["lastTrade"])
+        pairs = []
+        for strike in (s / 2 for s in range(2, int(last * 2))):
+            rng = random.Random(f"{underlier}{expiry_date}{strike}")
+            bid = rng.uniform(0, 5) * strike / last
+            put = {
+                "symbol": underlier,
+                "optionType": "PUT",
+                "strikePrice": f"{strike}",
+                "bid": f"{bid:.2f}",
+                "ask": f"{bid + 0.1:.2f}",
+                "lastPrice": f"{bid:.2f}",
+                "netChange": "0.1",
+                "volume": str(rng.randint(0, 50)),
+                "openInterest": str(rng.randint(0, 500)),
+                "OptionGreeks": {"iv": f"{rng.uniform(0.1, 0.9):.6f}"},
+            }
+            pairs.append({"Put": put})
+        return {"OptionChainResponse": {"OptionPair": pairs}}
+
+
+@pytest.fixture
+def manager() -> OptionsManager:
+    """A manager on a FakeMarket with its own caches, limiter and breaker, so
+    tests don't share state through the module level singletons."""
+    manager = OptionsManager(
+        "key",
+        "secret",
+        "token",
+        "token secret",
+        quote_cache=TTLCache(),
+        rate_limiter=RateLimiter(rate=1000, max_rate=1000, concurrency=8),
+        chain_cache=TTLCache(),
+        expiry_cache=TTLCache(),
+        scan_flights=SingleFlight(),
+        failed_tickers=TTLCache(),
+        circuit_breaker=CircuitBreaker(),
+    )
+    manager.market = FakeMarket()
+    return manager
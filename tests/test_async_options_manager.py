@@ -0,0 +1,88 @@
+import asyncio
+import socket
+
+import pytest
+
+from option_chains.async_options_manager import AsyncOptionsManager
+from option_chains.benchmarks import replay
+from option_chains.cache import TTLCache
+from option_chains.circuit_breaker import CircuitBreaker
+from option_chains.rate_limiter import RateLimiter
+
+SCAN_ARGS = dict(sector=None, sub_sector="Tech - Semiconductor")
+ROW_KEY = ["Ticker", "Exp", "Stk"]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def recorded(manager):
+    """The manager's FakeMarket responses, recorded while it scans, and served
+    from a replay stub."""
+    fixtures = replay.Fixtures()
+    manager.market = replay.RecordingMarket(manager.market, fixtures)
+    # a percentile of 100 records every ticker, not just the screened ones
+    manager.get_all_options_info(**SCAN_ARGS, percentile_of_52_range=100)
+
+    port = _free_port()
+    stop = replay.start_stub_server(replay.make_stub_app(fixtures), port=port)
+    yield manager, f"http://127.0.0.1:{port}/v1/market/"
+    stop()
+
+
+def _async_scan(base_url: str, **scan_args):
+    async def scan():
+        async with AsyncOptionsManager(
+            "key",
+            "secret",
+            "token",
+            "token secret",
+            quote_cache=TTLCache(),
+            base_url=base_url,
+            rate_limiter=RateLimiter(rate=1000, max_rate=1000, concurrency=8),
+            chain_cache=TTLCache(),
+            expiry_cache=TTLCache(),
+            failed_tickers=TTLCache(),
+            circuit_breaker=CircuitBreaker(),
+        ) as manager:
+            return await manager.get_all_options_info(**scan_args)
+
+    return asyncio.run(scan())
+
+
+@pytest.mark.parametrize("format_values", [True, False])
+def test_async_scan_matches_sync_scan(recorded, format_values):
+    manager, base_url = recorded
+    scan_args = dict(SCAN_ARGS, percentile_of_52_range=60, format_values=format_values)
+    expected = manager.get_all_options_info(**scan_args)
+    actual = _async_scan(base_url, **scan_args)
+
+    assert len(expected) > 100
+    # neither scan orders its rows
+    expected = expected.sort_values(ROW_KEY, ignore_index=True)
+    actual = actual.sort_values(ROW_KEY, ignore_index=True)
+    assert actual.equals(expected)
+
+
+def test_async_top_k_scan_matches_sync_scan(recorded):
+    manager, base_url = recorded
+    scan_args = dict(SCAN_ARGS, percentile_of_52_range=60, top_k=10)
+    expected = manager.get_all_options_info(**scan_args)
+    actual = _async_scan(base_url, **scan_args)
+
+    # top-K rows are best first, ties broken the same way by both
+    assert len(expected) == 10
+    assert actual.reset_index(drop=True).equals(expected.reset_index(drop=True))
+
+
+def test_async_scan_returns_partial_results_when_time_budget_runs_out(recorded):
+    _, base_url = recorded
+    # the budget is gone before any request, net of the deadline margin
+    df = _async_scan(base_url, **SCAN_ARGS, percentile_of_52_range=100, time_budget=0.5)
+
+    assert df.empty
+    assert df.attrs["unscanned"]
@@ -0,0 +1,96 @@
+import datetime
+
+import pytest
+
+from option_chains import cache
+from option_chains.cache import SQLiteCache, TTLCache
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return tmp_path / "cache.db"
+
+
+@pytest.fixture(params=["ttl", "sqlite"])
+def any_cache(request, sqlite_path):
+    if request.param == "ttl":
+        return TTLCache(ttl=60, maxsize=4)
+    return SQLiteCache(sqlite_path, "test", ttl=60, maxsize=4)
+
+
+def test_entries_expire_after_ttl(any_cache):
+    any_cache.set("kept", 1)
+    any_cache.set("expired", 2, ttl=0)
+
+    assert any_cache.get("kept") == 1
+    assert any_cache.get("expired") is None
+    assert any_cache.get("expired", "default") == "default"
+    assert len(any_cache) == 1
+
+
+def test_stats_count_hits_and_misses(any_cache):
+    any_cache.set("a", 1)
+    any_cache.get("a")
+    any_cache.get("a")
+    any_cache.get("b")
+    assert any_cache.stats() == {"size": 1, "hits": 2, "misses": 1}
+
+    any_cache.clear()
+    assert any_cache.stats() == {"size": 0, "hits": 0, "misses": 0}
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    ttl_cache = TTLCache(maxsize=3)
+    for key in "abc":
+        ttl_cache.set(key, key)
+    # a read makes "a" the most recently used, so "b" goes first
+    ttl_cache.get("a")
+    ttl_cache.set("d", "d")
+
+    assert len(ttl_cache) == 3
+    assert ttl_cache.get("b") is None
+    assert [ttl_cache.get(key) for key in "acd"] == ["a", "c", "d"]
+
+
+def test_sqlite_cache_evicts_every_evict_every_sets(sqlite_path):
+    sqlite_cache = SQLiteCache(sqlite_path, "test", maxsize=4)
+    for i in range(cache.EVICT_EVERY - 1):
+        sqlite_cache.set(i, i, ttl=100 + i)
+    assert len(sqlite_cache) == cache.EVICT_EVERY - 1
+
+    # the next set evicts down to maxsize, dropping the entries closest to expiry
+    sqlite_cache.set(cache.EVICT_EVERY - 1, 0, ttl=100 + cache.EVICT_EVERY - 1)
+    assert len(sqlite_cache) == 4
+    assert sqlite_cache.get(0) is None
+    assert sqlite_cache.get(cache.EVICT_EVERY - 4) == cache.EVICT_EVERY - 4
+
+
+def test_sqlite_cache_namespaces_share_a_file(sqlite_path):
+    quotes = SQLiteCache(sqlite_path, "quotes")
+    chains = SQLiteCache(sqlite_path, "chains")
+    quotes.set("GOOG", "quote")
+    chains.set("GOOG", "chain")
+
+    assert quotes.get("GOOG") == "quote"
+    assert chains.get("GOOG") == "chain"
+    # e.g. another worker opening the same file
+    assert SQLiteCache(sqlite_path, "quotes").get("GOOG") == "quote"
+
+    chains.clear()
+    assert chains.get("GOOG") is None
+    assert quotes.get("GOOG") == "quote"
+
+
+@pytest.mark.parametrize(
+    "value, prefix",
+    [
+        (("GOOG", datetime.date(2026, 11, 20), 1.5), b"p"),
+        (list(range(cache.COMPRESS_MIN_BYTES)), b"z"),
+    ],
+)
+def test_values_round_trip_compressed_or_not(sqlite_path, value, prefix):
+    assert cache._dumps(value)[:1] == prefix
+
+    sqlite_cache = SQLiteCache(sqlite_path, "test")
+    sqlite_cache.set(("GOOG", datetime.date(2026, 11, 20)), value)
+    assert sqlite_cache.get(("GOOG", datetime.date(2026, 11, 20))) == value
@@ -0,0 +1,54 @@
+import pytest
+import requests
+
+from option_chains.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def _http_error(status: int, text: str = "") -> requests.exceptions.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    response._content = text.encode()
+    return requests.exceptions.HTTPError(f"{status} Error", response=response)
+
+
+BAD_SYMBOL = _http_error(400, "<Error><message>The symbol is invalid.</message>")
+
+
+def _call(breaker: CircuitBreaker, ex: Exception = None):
+    with breaker.guard("chain"):
+        if ex is not None:
+            raise ex
+
+
+def _open(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            _call(breaker, requests.exceptions.ConnectionError())
+    assert breaker.state("chain") != "closed"
+
+
+def test_bad_symbol_trial_call_leaves_circuit_open():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    _open(breaker)
+
+    # the trial call hits a bad ticker, which says nothing about the endpoint
+    with pytest.raises(requests.exceptions.HTTPError):
+        _call(breaker, BAD_SYMBOL)
+    assert breaker.state("chain") == "half_open"
+
+    _call(breaker)
+    assert breaker.state("chain") == "closed"
+
+
+def test_bad_symbols_dont_reset_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        _call(breaker, requests.exceptions.ConnectionError())
+    with pytest.raises(requests.exceptions.HTTPError):
+        _call(breaker, BAD_SYMBOL)
+    with pytest.raises(requests.exceptions.HTTPError):
+        _call(breaker, _http_error(503))
+
+    assert breaker.state("chain") == "open"
+    with pytest.raises(CircuitOpenError):
+        _call(breaker)
@@ -0,0 +1,192 @@
+import copy
+import datetime
+import json
+import pathlib
+
+import pandas as pd
+import pytest
+import requests
+
+from option_chains import metrics, options_manager
+from option_chains.circuit_breaker import CircuitBreaker
+from option_chains.snapshot_store import SnapshotStore
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+SCAN_ARGS = dict(
+    sector=None, sub_sector="Tech - Semiconductor", percentile_of_52_range=100
+)
+
+
+def _http_error(status: int, text: str) -> requests.exceptions.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    response._content = text.encode()
+    return requests.exceptions.HTTPError(f"{status} Error", response=response)
+
+
+def test_auth_errors_do_not_cool_down_tickers(manager):
+    def expired_token(underlier, **kwargs):
+        raise _http_error(401, "oauth_problem=token_rejected")
+
+    manager.circuit_breaker = CircuitBreaker(reset_timeout=0)
+    manager.market.get_option_expire_date = expired_token
+    assert manager.get_all_options_frame(**SCAN_ARGS).empty
+    assert len(manager.failed_tickers) == 0
+
+    # the next scan after the api recovers finds the tickers again
+    del manager.market.get_option_expire_date
+    assert not manager.get_all_options_frame(**SCAN_ARGS).empty
+
+
+def test_invalid_symbol_cools_down_ticker(manager):
+    get_option_expire_date = manager.market.get_option_expire_date
+
+    def invalid_symbol(underlier, **kwargs):
+        if underlier == "NVDA":
+            raise _http_error(
+                400,
+                "<Error><code>10033</code>"
+                "<message>The symbol entered is invalid.</message></Error>",
+            )
+        return get_option_expire_date(underlier, **kwargs)
+
+    manager.market.get_option_expire_date = invalid_symbol
+    manager.get_all_options_frame(**SCAN_ARGS)
+    assert manager.failed_tickers.get("NVDA") == "expiry_dates: HTTPError"
+    assert len(manager.failed_tickers) == 1
+
+
+def test_failed_quote_chunk_skips_only_its_tickers(manager):
+    get_quote = manager.market.get_quote
+    failed_calls = []
+
+    def flaky_quotes(symbols, **kwargs):
+        if "NVDA" in symbols:
+            failed_calls.append(symbols)
+            raise _http_error(401, "oauth_problem=token_rejected")
+        return get_quote(symbols, **kwargs)
+
+    manager.market.get_quote = flaky_quotes
+    tickers = [f"T{i}" for i in range(30)] + ["NVDA"]
+    market_data, unquoted = manager._get_market_data_bulk(tickers)
+    # NVDA's request holds the last 6 tickers, the first 25 are still quoted
+    assert sorted(market_data) == sorted(tickers[:25])
+    assert unquoted == tickers[25:]
+    assert len(manager.failed_tickers) == 0
+    # an auth error fails the same way every attempt, so it isn't retried
+    assert len(failed_calls) == 1
+
+
+def test_snapshots_each_fetched_chain_once(manager, tmp_path):
+    manager.snapshot_store = SnapshotStore(tmp_path, flush_interval=60)
+    manager.get_all_options_frame(**SCAN_ARGS)
+    # a threshold-only change re-filters the cached chains
+    manager.get_all_options_frame(min_volume=10, **SCAN_ARGS)
+    manager.snapshot_store.flush()
+
+    snapshots = manager.snapshot_store.load()
+    assert not snapshots.empty
+    assert not snapshots.duplicated(["symbol", "expiryDate", "strikePrice"]).any()
+    # both scans are written together, as one file
+    assert len(list(tmp_path.glob("date=*/*.parquet"))) == 1
+
+
+def test_cache_metrics_include_manager_caches(manager):
+    manager.get_all_options_frame(**SCAN_ARGS)
+    misses = options_manager._cache_stats("misses")
+    assert manager.expiry_cache.stats()["misses"] > 0
+    assert misses[(("cache", "expiry"),)] >= manager.expiry_cache.stats()["misses"]
+    rendered = metrics.REGISTRY.render()
+    assert 'option_chains_cache_misses_total{cache="expiry"}' in rendered
+
+
+def _reference_put(put: dict, contracts_to_buy: int, today: datetime.date) -> dict:
+    """The original per put dict processing, kept to check the vectorized
+    version against."""
+    put["belowMarketPct"] = round(
+        (float(put["marketPrice"]) - float(put["strikePrice"]))
+        / float(put["marketPrice"]),
+        3,
+    )
+    put["OptionGreeks"]["iv"] = round(float(put["OptionGreeks"]["iv"]), 2)
+
+    contracts_to_buy = min(contracts_to_buy, int(put["volume"]))
+    contract_price = sum([float(put["bid"]), float(put["ask"])]) / 2
+    revenue = contract_price * (100 * contracts_to_buy)
+    days_to_hold = put["expiryDate"] - today
+    annualize_factor = (365 / days_to_hold.days) if days_to_hold.days > 0 else 0
+    put["auxiliaryInfo"] = {
+        "contractsToBuy": contracts_to_buy,
+        "revenue": round(revenue, 2),
+        "annualizedRevenue": int(revenue * annualize_factor),
+        "annualizedReturn": round(
+            ((revenue / (float(put["strikePrice"]) * 100)) * annualize_factor), 4
+        ),
+        "notionalPrinciple": round(float(put["strikePrice"]) * 100 * contracts_to_buy),
+    }
+    return put
+
+
+@pytest.mark.parametrize(
+    "contracts_to_buy, min_volume, min_open_interest, min_annualized_return",
+    [(1, 1, 1, 0.0), (3, 5, 100, 11.0), (10, 0, 0, 25.0)],
+)
+def test_vectorized_puts_match_reference(
+    monkeypatch, contracts_to_buy, min_volume, min_open_interest, min_annualized_return
+):
+    fixture = json.loads((FIXTURES / "option_chains.json").read_text())
+    today = datetime.date.fromisoformat(fixture["today"])
+    monkeypatch.setattr(options_manager, "_today", lambda: pd.Timestamp(today))
+    manager = options_manager.BaseOptionsManager()
+
+    for chain in fixture["chains"]:
+        expiry_date = datetime.date.fromisoformat(chain["expiry_date"])
+        market_price = chain["market_price"]
+        valid_strikes = set(range(int(market_price * 0.6), int(market_price * 0.95)))
+
+        puts = manager._parse_puts(
+            chain["ticker"],
+            expiry_date,
+            copy.deepcopy(chain["response"]),
+            market_price,
+            valid_strikes,
+        )
+        puts = manager.filter_puts(
+            chain["ticker"],
+            puts,
+            min_volume=min_volume,
+            min_open_interest=min_open_interest,
+            min_annualized_return=min_annualized_return,
+            contracts_to_buy=contracts_to_buy,
+        )
+        actual = manager._puts_to_dicts(puts)
+
+        expected = []
+        for pair in copy.deepcopy(chain["response"])["OptionChainResponse"][
+            "OptionPair"
+        ]:
+            put = pair["Put"]
+            if int(float(put["strikePrice"])) not in valid_strikes:
+                continue
+            put.update(expiryDate=expiry_date, marketPrice=market_price)
+            put = _reference_put(put, contracts_to_buy, today)
+            if (
+                int(put["volume"]) >= min_volume
+                and int(put["openInterest"]) >= min_open_interest
+                and put["auxiliaryInfo"]["annualizedReturn"]
+                >= min_annualized_return / 100
+            ):
+                expected.append(put)
+
+        assert len(actual) == len(expected) > 0
+        for actual_put, expected_put in zip(actual, expected):
+            for key in ("bid", "ask", "lastPrice", "strikePrice", "netChange"):
+                assert actual_put[key] == float(expected_put[key])
+            for key in ("volume", "openInterest"):
+                assert actual_put[key] == int(expected_put[key])
+            for key in ("symbol", "optionType", "expiryDate", "marketPrice"):
+                assert actual_put[key] == expected_put[key]
+            assert actual_put["belowMarketPct"] == expected_put["belowMarketPct"]
+            assert actual_put["OptionGreeks"] == expected_put["OptionGreeks"]
+            assert actual_put["auxiliaryInfo"] == expected_put["auxiliaryInfo"]
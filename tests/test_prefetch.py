@@ -0,0 +1,66 @@
+from option_chains.cache import SQLiteCache
+from option_chains.prefetch import PrefetchScheduler
+
+SCAN_ARGS = dict(sector="Financials", sub_sector=None, percentile_of_52_range=100)
+
+
+def test_prefetch_stops_scan_when_budget_is_spent(manager):
+    prefetcher = PrefetchScheduler(
+        lambda: manager, [SCAN_ARGS], request_budget=40, market_hours_only=False
+    )
+    prefetcher.run_once()
+
+    calls = sum(manager.market.calls.values())
+    # at most the requests in flight when the budget ran out go over it
+    assert 40 <= calls <= 40 + manager.thread_count
+    assert prefetcher.requests_spent() == calls
+    snapshot = prefetcher.get_snapshot(SCAN_ARGS)
+    assert snapshot.df.attrs["unscanned"]
+
+    # the budget for the hour is spent, so the next run makes no requests
+    prefetcher.run_once()
+    assert sum(manager.market.calls.values()) == calls
+
+
+def test_prefetch_budget_ignores_other_requests(manager):
+    prefetcher = PrefetchScheduler(
+        lambda: manager, [SCAN_ARGS], request_budget=10_000, market_hours_only=False
+    )
+    get_option_chains = manager.market.get_option_chains
+
+    def get_option_chains_alongside_user(*args, **kwargs):
+        # a user's request on the same limiter while the prefetch runs
+        with manager.rate_limiter.limit():
+            pass
+        return get_option_chains(*args, **kwargs)
+
+    manager.market.get_option_chains = get_option_chains_alongside_user
+    prefetcher.run_once()
+    assert prefetcher.requests_spent() == sum(manager.market.calls.values())
+
+
+def test_prefetch_runs_in_one_process(manager, tmp_path):
+    def make_prefetcher():
+        return PrefetchScheduler(
+            lambda: manager,
+            [SCAN_ARGS],
+            market_hours_only=False,
+            snapshots=SQLiteCache(str(tmp_path / "cache.db"), "prefetch"),
+            lock_path=str(tmp_path / "prefetch.lock"),
+        )
+
+    # e.g. two gunicorn workers
+    runner, reader = make_prefetcher(), make_prefetcher()
+    runner.run_once()
+    calls = sum(manager.market.calls.values())
+    assert calls
+    reader.run_once()
+    assert sum(manager.market.calls.values()) == calls
+    assert reader.requests_spent() == 0
+    assert reader.get_snapshot(SCAN_ARGS).df.equals(runner.get_snapshot(SCAN_ARGS).df)
+
+    # the lock is given up when the runner stops
+    taken_at = reader.get_snapshot(SCAN_ARGS).taken_at
+    runner.stop()
+    reader.run_once()
+    assert reader.get_snapshot(SCAN_ARGS).taken_at > taken_at
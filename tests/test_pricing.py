@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from option_chains import pricing
+
+
+@pytest.fixture
+def puts():
+    """Puts from deep in to far out of the money, a week to two years out."""
+    spot, strike, years, iv = np.meshgrid(
+        [100.0],
+        np.linspace(50, 150, 21),
+        [7 / 365, 0.25, 1.0, 2.0],
+        [0.05, 0.2, 0.5, 1.5],
+        indexing="ij",
+    )
+    return spot.ravel(), strike.ravel(), years.ravel(), iv.ravel()
+
+
+def test_implied_volatility_reproduces_put_prices(puts):
+    spot, strike, years, iv = puts
+    price = pricing.put_price(spot, strike, years, iv)
+    solved = pricing.implied_volatility(price, spot, strike, years)
+
+    # puts whose price hardly moves with volatility can't be solved for it
+    solvable = ~np.isnan(solved)
+    assert solvable.mean() > 0.9
+    np.testing.assert_allclose(
+        pricing.put_price(spot, strike, years, solved)[solvable],
+        price[solvable],
+        atol=pricing.IV_TOLERANCE,
+    )
+    # and where vega is material, the volatility itself comes back
+    material = pricing.put_greeks(spot, strike, years, iv)["vega"] > 1
+    assert material.sum() > len(iv) / 2
+    np.testing.assert_allclose(solved[material], iv[material], rtol=1e-4)
+
+
+def test_implied_volatility_of_a_scalar():
+    price = pricing.put_price(100, 95, 0.5, 0.3)
+    solved = pricing.implied_volatility(price, 100, 95, 0.5)
+    assert solved.shape == ()
+    assert solved == pytest.approx(0.3, rel=1e-6)
+
+
+@pytest.mark.parametrize(
+    "price, strike, years",
+    [
+        (5.0, 101, 0.0),  # expired
+        (45.0, 150, 0.5),  # below the no-arbitrage bound of 150e^-rt - 100
+        (96.0, 101, 0.5),  # above the strike's present value
+    ],
+)
+def test_implied_volatility_is_nan_without_a_solution(price, strike, years):
+    assert np.isnan(pricing.implied_volatility(price, 100, strike, years))
+
+
+def test_expired_puts_are_worth_intrinsic_value():
+    np.testing.assert_array_equal(
+        pricing.put_price(100, [90, 110], 0, 0.3), [0.0, 10.0]
+    )
+    assert np.isnan(pricing.put_greeks(100, 90, 0, 0.3)["delta"])
+
+
+def test_vega_is_the_price_derivative(puts):
+    spot, strike, years, iv = puts
+    bump = 1e-5
+    vega = (
+        pricing.put_price(spot, strike, years, iv + bump)
+        - pricing.put_price(spot, strike, years, iv - bump)
+    ) / (2 * bump)
+    greeks = pricing.put_greeks(spot, strike, years, iv)
+    np.testing.assert_allclose(greeks["vega"], vega, rtol=1e-4, atol=1e-6)
+    assert ((greeks["delta"] >= -1) & (greeks["delta"] <= 0)).all()
@@ -0,0 +1,80 @@
+import pytest
+import requests
+
+from option_chains.rate_limiter import FAILED, THROTTLED, RateLimiter
+
+
+def _http_error(status: int) -> requests.exceptions.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f"{status} Error", response=response)
+
+
+def _request(limiter: RateLimiter, ex: Exception = None):
+    try:
+        with limiter.limit():
+            if ex is not None:
+                raise ex
+    except Exception:
+        pass
+
+
+def test_throttle_halves_rate_and_concurrency():
+    limiter = RateLimiter(rate=20, concurrency=8)
+    _request(limiter, _http_error(429))
+    assert limiter.rate == 10
+    assert limiter.concurrency == 4
+    assert limiter.throttle_events == 1
+    assert limiter.in_flight == 0
+
+
+def test_throttles_within_backoff_interval_back_off_once():
+    limiter = RateLimiter(rate=20, concurrency=8, backoff_interval=60)
+    for _ in range(3):
+        _request(limiter, _http_error(503))
+    assert limiter.rate == 10
+    assert limiter.concurrency == 4
+    assert limiter.throttle_events == 3
+
+    limiter = RateLimiter(rate=20, concurrency=8, backoff_interval=0)
+    for _ in range(2):
+        _request(limiter, _http_error(503))
+    assert limiter.rate == 5
+    assert limiter.concurrency == 2
+
+
+def test_success_ramps_up_additively():
+    limiter = RateLimiter(rate=10, max_rate=50, concurrency=4, max_concurrency=32)
+    _request(limiter)
+    assert limiter.rate == pytest.approx(10.1)
+    # one slot per window of successes, a window being the concurrency limit
+    for _ in range(4):
+        _request(limiter)
+    assert limiter.concurrency == 5
+
+    limiter = RateLimiter(rate=50, max_rate=50)
+    _request(limiter)
+    assert limiter.rate == 50
+
+
+@pytest.mark.parametrize(
+    "ex", [_http_error(401), _http_error(400), requests.exceptions.ConnectionError()]
+)
+def test_other_failures_leave_limits_unchanged(ex):
+    limiter = RateLimiter(rate=10, concurrency=4)
+    for _ in range(3):
+        _request(limiter, ex)
+    assert limiter.rate == 10
+    assert limiter.concurrency == 4
+    assert limiter.throttle_events == 0
+    assert limiter.in_flight == 0
+
+
+def test_release_outcomes():
+    limiter = RateLimiter(rate=10, concurrency=4, backoff_interval=0)
+    limiter.acquire()
+    limiter.release(FAILED)
+    assert limiter.rate == 10
+    limiter.acquire()
+    limiter.release(THROTTLED)
+    assert limiter.rate == 5
@@ -0,0 +1,100 @@
+import datetime
+import json
+
+import pandas as pd
+import pytest
+
+from option_chains.scan_results import ScanResults, page_to_json, parse_sort
+
+
+@pytest.fixture
+def results() -> ScanResults:
+    return ScanResults(
+        pd.DataFrame(
+            {
+                "Ticker": ["NVDA", "AMD", "JPM", "AMD"],
+                "Company": [
+                    "NVIDIA Corp",
+                    "Advanced Micro",
+                    "JPMorgan",
+                    "Advanced Micro",
+                ],
+                "Exp": [
+                    datetime.date(2026, 11, 20),
+                    datetime.date(2026, 12, 18),
+                    datetime.date(2026, 11, 20),
+                    datetime.date(2026, 11, 20),
+                ],
+                "Stk": [100.0, 120.0, 200.0, 110.0],
+                "A%": [0.3, 0.2, 0.1, 0.2],
+            }
+        )
+    )
+
+
+def test_parse_sort():
+    assert parse_sort("A%,-Stk") == [("A%", True), ("Stk", False)]
+    assert parse_sort(" -Exp , ,Ticker ") == [("Exp", False), ("Ticker", True)]
+    assert parse_sort("") == []
+    assert parse_sort(None) == []
+
+
+def test_query_sorts_stably_on_several_columns(results):
+    total, page = results.query(sort=parse_sort("A%,-Stk"))
+    assert total == 4
+    assert page["Stk"].to_list() == [200.0, 120.0, 110.0, 100.0]
+
+    # ties keep scan order
+    _, page = results.query(sort=parse_sort("Ticker"))
+    assert page.index.to_list() == [1, 3, 2, 0]
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ({"Stk": ">=110"}, [1, 2, 3]),
+        ({"Stk": "<110"}, [0]),
+        ({"Stk": "110"}, [3]),
+        ({"Stk": "105..150"}, [1, 3]),
+        ({"Exp": "2026-11-20"}, [0, 2, 3]),
+        ({"Exp": ">2026-11-20"}, [1]),
+        ({"Company": "micro"}, [1, 3]),
+        ({"Ticker": "amd", "Stk": ">115"}, [1]),
+        ({"Stk": ""}, [0, 1, 2, 3]),
+    ],
+)
+def test_query_filters(results, filters, expected):
+    total, page = results.query(filters=filters)
+    assert total == len(expected)
+    assert page.index.to_list() == expected
+
+
+def test_query_searches_text_columns(results):
+    _, page = results.query(search="morgan")
+    assert page["Ticker"].to_list() == ["JPM"]
+    # numbers and dates aren't searched
+    assert results.query(search="2026")[0] == 0
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(filters={"Stk": ">abc"}),
+        dict(filters={"Exp": "11/20/2026"}),
+        dict(filters={"Volume": "1"}),
+        dict(sort=[("Volume", True)]),
+    ],
+)
+def test_query_rejects_bad_columns_and_filters(results, kwargs):
+    with pytest.raises(ValueError):
+        results.query(**kwargs)
+
+
+def test_query_pages(results):
+    total, page = results.query(sort=parse_sort("Stk"), offset=1, limit=2)
+    assert total == 4
+    assert page["Stk"].to_list() == [110.0, 120.0]
+    assert json.loads(page_to_json(page)) == [
+        [3, "AMD", "Advanced Micro", "2026-11-20", 110.0, 0.2],
+        [1, "AMD", "Advanced Micro", "2026-12-18", 120.0, 0.2],
+    ]
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from option_chains import sectors
+
+HEADER = "Ticker,Blue Chip,Name,Sector,Sub-Sector\n"
+
+
+@pytest.fixture
+def sectors_csv(tmp_path, monkeypatch):
+    path = tmp_path / "sectors.csv"
+    path.write_text(
+        HEADER
+        + "NVDA,Yes,NVIDIA,Technology,Tech - Semiconductor\n"
+        + "AMD,No,AMD,Technology,Tech - Semiconductor\n"
+        + "JPM,Yes,JPMorgan,Financials,Banks\n"
+    )
+    monkeypatch.setattr(sectors, "SECTORS_PATH", path)
+    monkeypatch.setattr(sectors, "_index", None)
+    return path
+
+
+def test_sector_index_is_loaded_once(sectors_csv):
+    index = sectors.get_sector_index()
+    assert sectors.get_sector_index() is index
+
+    assert index.get_tickers("Technology") == ["NVDA", "AMD"]
+    assert index.get_tickers(sub_sector="Banks") == ["JPM"]
+    assert index.get_tickers(blue_chip_only=True) == ["NVDA", "JPM"]
+    assert index.all_sectors == ["All", "Financials", "Technology"]
+
+
+def test_sector_index_reloads_when_csv_changes(sectors_csv):
+    index = sectors.get_sector_index()
+
+    sectors_csv.write_text(HEADER + "XOM,Yes,Exxon,Energy,Oil & Gas\n")
+    # make sure the mtime changes on filesystems with a coarse resolution
+    mtime = sectors_csv.stat().st_mtime
+    os.utime(sectors_csv, (mtime + 1, mtime + 1))
+
+    reloaded = sectors.get_sector_index()
+    assert reloaded is not index
+    assert reloaded.tickers == ["XOM"]
+    assert reloaded.ticker_to_sector == {"XOM": "Energy"}
+    assert sectors.get_sector_index() is reloaded
@@ -0,0 +1,70 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from option_chains.single_flight import SingleFlight
+
+CALLERS = 8
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def _run_concurrently(flights: SingleFlight, fn, key="scan"):
+    """Call fn through flights from CALLERS threads, with the first call held
+    until every other caller is waiting on it."""
+    release = threading.Event()
+
+    def held():
+        release.wait()
+        return fn()
+
+    with ThreadPoolExecutor(CALLERS) as executor:
+        futures = [executor.submit(flights.do, key, held) for _ in range(CALLERS)]
+        _wait_for(lambda: flights.stats()["coalesced"] == CALLERS - 1)
+        release.set()
+    return futures
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    futures = _run_concurrently(flights, lambda: calls.append(1) or object())
+
+    assert len(calls) == 1
+    results = [future.result() for future in futures]
+    assert all(result is results[0] for result in results)
+    assert flights.stats() == {
+        "executions": 1,
+        "coalesced": CALLERS - 1,
+        "in_flight": 0,
+    }
+
+
+def test_concurrent_callers_share_the_error():
+    flights = SingleFlight()
+
+    def fail():
+        raise ValueError("scan failed")
+
+    futures = _run_concurrently(flights, fail)
+
+    for future in futures:
+        with pytest.raises(ValueError, match="scan failed"):
+            future.result()
+    assert flights.stats()["executions"] == 1
+
+
+def test_calls_after_a_finished_call_run_again():
+    flights = SingleFlight()
+    assert flights.do("scan", lambda: 1) == 1
+    assert flights.do("scan", lambda: 2) == 2
+    assert flights.do("other", lambda: 3) == 3
+    assert flights.stats() == {"executions": 3, "coalesced": 0, "in_flight": 0}
@@ -0,0 +1,12 @@
+from option_chains.top_k import TopK
+
+
+def test_push_with_only_makes_kept_items():
+    top = TopK(2)
+    made = []
+    for key in [3, 1, 4, 1, 5]:
+        top.push_with(key, lambda key=key: made.append(key) or key)
+    assert top.items() == [5, 4]
+    assert top.pushed == 5
+    # the second 1 can't beat the smallest kept key, 3, when it's pushed
+    assert made == [3, 1, 4, 5]